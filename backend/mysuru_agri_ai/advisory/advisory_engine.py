@@ -4,24 +4,67 @@ import numpy as np
 import pandas as pd
 
 
-def _format_strategy_row(row: pd.Series) -> str:
+_ADVISORY_NOTE = (
+    "Advisory note: These projections are based on historical weather, soil "
+    "nutrient profiles, and recorded management practices in Mysuru. Farmers "
+    "should adapt these recommendations to their specific field conditions, "
+    "water availability, and market demand, and review them with local "
+    "agronomists where possible."
+)
+
+_STRATEGY_COLUMNS = (
+    "Crops",
+    "Season",
+    "Irrigation",
+    "Soil type",
+    "predicted_yield",
+    "confidence",
+    "risk_level",
+    "Area",
+    "estimated_total_yield",
+)
+
+
+# Defaults for optional columns that are absent from the ranked frame. Like
+# the former row.get() lookups they do not replace missing values, so a NaN
+# soil type still renders as "nan".
+_STRATEGY_DEFAULTS = {"Soil type": "unspecified soil", "confidence": 0.0}
+
+
+def _strategy_records(top: pd.DataFrame) -> np.recarray:
+    """
+    Return the columns used by `_format_strategy_row` as numpy records,
+    adding absent optional columns once so rows need no per-field lookups.
+    """
+    top = top.reindex(columns=list(_STRATEGY_COLUMNS)).assign(
+        **{col: val for col, val in _STRATEGY_DEFAULTS.items() if col not in top.columns}
+    )
+    # "Soil type" is not a valid attribute name on a record.
+    return top.rename(columns={"Soil type": "soil_type"}).to_records(index=False)
+
+
+def _present(value) -> bool:
+    # NaN is the only value not equal to itself.
+    return value is not None and value == value
+
+
+def _format_strategy_row(rec: np.record) -> str:
     area_txt = ""
     total_txt = ""
-    if "Area" in row.index and pd.notna(row["Area"]):
-        area_txt = f", area {float(row['Area']):g} acres"
-    if "estimated_total_yield" in row.index and pd.notna(row["estimated_total_yield"]):
-        total_txt = f" (~{float(row['estimated_total_yield']):.2f} tons total)"
+    if _present(rec.Area):
+        area_txt = f", area {float(rec.Area):g} acres"
+    if _present(rec.estimated_total_yield):
+        total_txt = f" (~{float(rec.estimated_total_yield):.2f} tons total)"
 
-    soil = row.get("Soil type", "unspecified soil")
-    conf = float(row.get("confidence", 0.0))
+    conf = float(rec.confidence)
     if conf >= 80.0:
-        tail = f"(confidence {conf:.0f}%, risk {row['risk_level']})"
+        tail = f"(confidence {conf:.0f}%, risk {rec.risk_level})"
     else:
-        tail = f"(risk {row['risk_level']})"
+        tail = f"(risk {rec.risk_level})"
 
     return (
-        f"{row['Crops']} - {row['Season']} - {row['Irrigation']} on {soil}"
-        f"{area_txt} - {row['predicted_yield']:.2f} tons/acre{total_txt} "
+        f"{rec.Crops} - {rec.Season} - {rec.Irrigation} on {rec.soil_type}"
+        f"{area_txt} - {rec.predicted_yield:.2f} tons/acre{total_txt} "
         f"{tail}"
     )
 
@@ -55,27 +98,25 @@ def build_advisory_report(
     best_irrigation = analytics.get("best_irrigation")
     second_irrig = analytics.get("second_irrigation")
 
-    lines = []
-    lines.append(
-        f"After analysing {scenario_count} possible farming configurations for {district} district:"
-    )
-    lines.append("")
-    lines.append(
-        "The highest predicted yield is achieved by cultivating "
-        f"{best_crop} during the {best_season} season using {best_irrig.lower()} irrigation "
-        f"on {best_soil.lower()}."
-    )
     if best_conf >= 80.0:
         conf_fragment = f"(confidence {best_conf:.0f}%, risk level: {best_risk})."
     else:
         conf_fragment = f"(risk level: {best_risk})."
 
-    lines.append(
-        f"Estimated yield: {best_yield:.2f} tons/acre {conf_fragment}"
+    # Every section below ends with its own newline, so the report is a
+    # plain concatenation of fixed templates plus the optional blocks.
+    header = (
+        f"After analysing {scenario_count} possible farming configurations for {district} district:\n"
+        "\n"
+        "The highest predicted yield is achieved by cultivating "
+        f"{best_crop} during the {best_season} season using {best_irrig.lower()} irrigation "
+        f"on {best_soil.lower()}.\n"
+        f"Estimated yield: {best_yield:.2f} tons/acre {conf_fragment}\n"
+        "\n"
     )
-    lines.append("")
 
     # Evidence note (useful for districts without labeled training data).
+    evidence = ""
     if "evidence_level" in ranked.columns:
         low = ranked[ranked["evidence_level"] == "Low"]
         if not low.empty:
@@ -85,66 +126,67 @@ def build_advisory_report(
                 else []
             )
             if d_list:
-                lines.append(
+                evidence = (
                     "Evidence note: Some scenarios are outside the labeled training data "
                     f"coverage for {', '.join(d_list)}. Treat these recommendations as "
-                    "indicative and validate with local agronomy guidance."
+                    "indicative and validate with local agronomy guidance.\n"
+                    "\n"
                 )
-                lines.append("")
 
+    stability = ""
     if lowest_risk_row.name != best_row.name:
-        lines.append(
-            "From a risk-management perspective, the most stable configuration is:"
-        )
-        lines.append(
+        stability = (
+            "From a risk-management perspective, the most stable configuration is:\n"
             f"{lowest_risk_row['Crops']} in {lowest_risk_row['Season']} with "
             f"{lowest_risk_row['Irrigation'].lower()} irrigation on "
             f"{str(lowest_risk_row.get('Soil type', 'unspecified soil')).lower()}, "
             f"delivering approximately {lowest_risk_row['predicted_yield']:.2f} tons/acre "
-            f"with risk classified as {lowest_risk_row['risk_level']}."
+            f"with risk classified as {lowest_risk_row['risk_level']}.\n"
+            "\n"
         )
-        lines.append("")
 
+    irrigation_insight = ""
     if (
         irrig_improvement_pct is not None
         and best_irrigation is not None
         and second_irrig is not None
         and np.isfinite(irrig_improvement_pct)
     ):
-        lines.append(
+        irrigation_insight = (
             f"{best_irrigation['Irrigation']} irrigation improves yield by approximately "
             f"{irrig_improvement_pct:.1f}% compared to {second_irrig['Irrigation']} systems "
-            "under similar crop and seasonal conditions."
+            "under similar crop and seasonal conditions.\n"
         )
 
+    season_insight = ""
     seasonal_stats = analytics.get("seasonal_stats")
     if seasonal_stats is not None and not seasonal_stats.empty:
         top_season = seasonal_stats.iloc[0]
-        lines.append(
+        season_insight = (
             f"Across all crops in the simulation, the {top_season['Season']} season "
-            f"offers the strongest average yield at {top_season['mean']:.2f} tons/acre."
+            f"offers the strongest average yield at {top_season['mean']:.2f} tons/acre.\n"
         )
 
+    spread_insight = ""
     if yield_difference is not None:
-        lines.append(
+        spread_insight = (
             f"The spread between the best and weakest simulated strategies is "
             f"around {yield_difference:.2f} tons/acre, highlighting the importance "
-            "of aligning crop choice, season, irrigation method, and soil management."
+            "of aligning crop choice, season, irrigation method, and soil management.\n"
         )
 
-    lines.append("")
-    lines.append("Top 5 recommended strategies:")
-    for idx, row in top5.iterrows():
-        lines.append(f"{idx + 1}. {_format_strategy_row(row)}")
-
-    lines.append("")
-    lines.append(
-        "Advisory note: These projections are based on historical weather, soil "
-        "nutrient profiles, and recorded management practices in Mysuru. Farmers "
-        "should adapt these recommendations to their specific field conditions, "
-        "water availability, and market demand, and review them with local "
-        "agronomists where possible."
+    strategies = "".join(
+        f"{rank}. {_format_strategy_row(rec)}\n"
+        for rank, rec in enumerate(_strategy_records(top5), start=1)
     )
 
-    return "\n".join(lines)
+    return (
+        f"{header}{evidence}{stability}"
+        f"{irrigation_insight}{season_insight}{spread_insight}"
+        "\n"
+        "Top 5 recommended strategies:\n"
+        f"{strategies}"
+        "\n"
+        f"{_ADVISORY_NOTE}"
+    )
 
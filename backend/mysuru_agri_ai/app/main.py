@@ -1,5 +1,6 @@
 import logging
-from typing import Dict, List, Optional, Union
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Union
 
 import pandas as pd
 from fastapi import Depends, FastAPI, HTTPException
@@ -18,15 +19,6 @@ from ..simulation.ranking_engine import rank_strategies
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(
-    title="Mysuru Smart Yield Simulation & Optimization Engine",
-    description=(
-        "Precision agriculture decision-support API for simulating crop, season, "
-        "soil, and irrigation strategies in Mysuru district."
-    ),
-    version="1.0.0",
-)
-
 
 def _normalize_title(v: str) -> str:
     return str(v).strip().title()
@@ -34,22 +26,42 @@ def _normalize_title(v: str) -> str:
 
 def _get_model_bundle() -> ModelBundle:
     """
-    Dependency that returns a cached model bundle (loaded once per process).
+    Dependency that returns the latest model bundle. Loads are cached on the
+    artifacts' modification times, so a retrained model is picked up without
+    reloading on every request.
     """
-    bundle = getattr(app.state, "model_bundle", None)
-    if bundle is not None:
-        return bundle
-
     try:
-        bundle = load_latest_model()
+        return load_latest_model()
     except FileNotFoundError as exc:
         raise HTTPException(status_code=500, detail=str(exc))
     except Exception as exc:  # pragma: no cover - defensive
         logger.exception("Failed to load model: %s", exc)
         raise HTTPException(status_code=500, detail="Failed to load model.")
 
-    app.state.model_bundle = bundle
-    return bundle
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """
+    Load the model bundle once at startup so the first request does not pay
+    the artifact deserialization cost. If artifacts are missing, the
+    dependency above retries lazily and reports the error per request.
+    """
+    try:
+        _get_model_bundle()
+    except HTTPException as exc:
+        logger.warning("Model bundle not preloaded at startup: %s", exc.detail)
+    yield
+
+
+app = FastAPI(
+    title="Mysuru Smart Yield Simulation & Optimization Engine",
+    description=(
+        "Precision agriculture decision-support API for simulating crop, season, "
+        "soil, and irrigation strategies in Mysuru district."
+    ),
+    version="1.0.0",
+    lifespan=_lifespan,
+)
 
 
 class SimulationRequest(BaseModel):
@@ -62,6 +74,14 @@ class SimulationRequest(BaseModel):
     soil_type: List[str] = Field(..., description="List of soil types.")
     irrigation: List[str] = Field(..., description="List of irrigation methods.")
     area: List[float] = Field(..., description="List of field areas (e.g. acres).")
+    fast_ci: bool = Field(
+        default=False,
+        description=(
+            "Use the recorded residual spread for confidence intervals instead "
+            "of per-tree predictions. Faster for large selections, but all "
+            "scenarios of a district share one interval width."
+        ),
+    )
 
     @validator("crop", "season", "soil_type", "irrigation", "area")
     def non_empty(cls, v: List):  # type: ignore[override]
@@ -196,7 +216,9 @@ def simulate(
         raise HTTPException(status_code=500, detail="Failed to generate scenarios.")
 
     try:
-        prediction_results = batch_predict(bundle, scenarios)
+        # Per-tree intervals by default: risk, confidence and the stability
+        # ranking depend on per-scenario interval width.
+        prediction_results = batch_predict(bundle, scenarios, fast_ci=request.fast_ci)
         ranked, analytics = rank_strategies(prediction_results)
         district_label = (
             ", ".join(sorted(set(scenarios["district"])))
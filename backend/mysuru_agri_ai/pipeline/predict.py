@@ -1,12 +1,21 @@
 import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Optional, Tuple
+from weakref import WeakKeyDictionary
 
 import joblib
 import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
 import pandas as pd
+try:  # Numba is optional; without it forests are predicted tree by tree
+    from numba import njit  # type: ignore[import]
+except Exception:  # pragma: no cover - defensive
+    njit = None
 
 
 logger = logging.getLogger(__name__)
@@ -14,6 +23,14 @@ logger = logging.getLogger(__name__)
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 MODELS_DIR = PROJECT_ROOT / "models"
 
+# Scenario batches larger than this are split across a thread pool for
+# prediction; tree predict runs in native code and releases the GIL.
+PREDICT_CHUNK_ROWS = 4096
+
+# Forests with fewer trees than this are predicted serially; below it the
+# thread dispatch costs more than it saves.
+PARALLEL_TREES_MIN = 16
+
 
 @dataclass
 class ModelBundle:
@@ -22,47 +39,352 @@ class ModelBundle:
     metadata: Dict
 
 
+def _mtime_ns(path: Path) -> Optional[int]:
+    return path.stat().st_mtime_ns if path.exists() else None
+
+
 def load_latest_model() -> ModelBundle:
     """
     Load the latest trained model, preprocessor, and metadata.
+
+    Bundles are memoized on the artifacts' modification times, so repeated
+    calls return the already-loaded bundle until training writes new files.
     """
     models_dict_path = MODELS_DIR / "yield_models.pkl"
     model_path = MODELS_DIR / "yield_model.pkl"
-    preproc_path = MODELS_DIR / "preprocessor.pkl"
-    metadata_path = MODELS_DIR / "metadata.json"
 
     if not models_dict_path.exists() and not model_path.exists():
         raise FileNotFoundError(
             f"No model artifacts found in {MODELS_DIR}. Have you run the training script?"
         )
 
-    model = joblib.load(models_dict_path) if models_dict_path.exists() else joblib.load(model_path)
-    preprocessor = joblib.load(preproc_path) if preproc_path.exists() else None
-    metadata = json.loads(metadata_path.read_text(encoding="utf-8")) if metadata_path.exists() else {}
+    return _load_model_bundle(
+        str(MODELS_DIR),
+        _mtime_ns(models_dict_path),
+        _mtime_ns(model_path),
+        _mtime_ns(MODELS_DIR / "preprocessor.pkl"),
+        _mtime_ns(MODELS_DIR / "metadata.json"),
+    )
+
+
+# One entry: a retrain replaces the bundle instead of keeping stale
+# memory-mapped artifacts alive alongside it.
+@lru_cache(maxsize=1)
+def _load_model_bundle(
+    models_dir: str,
+    models_dict_mtime: Optional[int],
+    model_mtime: Optional[int],
+    preproc_mtime: Optional[int],
+    metadata_mtime: Optional[int],
+) -> ModelBundle:
+    # The mtimes only key the cache; a changed artifact yields a new key.
+    models_dir_path = Path(models_dir)
+    models_dict_path = models_dir_path / "yield_models.pkl"
+    model_path = models_dir_path / "yield_model.pkl"
+    preproc_path = models_dir_path / "preprocessor.pkl"
+    metadata_path = models_dir_path / "metadata.json"
+
+    # Memory-map numpy arrays read-only: skips copying them on load and lets
+    # several worker processes share the same pages.
+    model = joblib.load(
+        models_dict_path if models_dict_mtime is not None else model_path, mmap_mode="r"
+    )
+    # A unified pipeline already carries the fitted preprocessor that
+    # preprocessor.pkl duplicates; share it rather than unpickling a copy.
+    unified = model.get("__unified__") if isinstance(model, dict) else model
+    steps = getattr(unified, "named_steps", None)
+    if steps is not None and "preprocessor" in steps:
+        preprocessor = steps["preprocessor"]
+    else:
+        preprocessor = joblib.load(preproc_path, mmap_mode="r") if preproc_mtime is not None else None
+    metadata = json.loads(metadata_path.read_text(encoding="utf-8")) if metadata_mtime is not None else {}
     logger.info(
         "Loaded model version %s", metadata.get("version", "unknown")
     )
     return ModelBundle(model=model, preprocessor=preprocessor, metadata=metadata)
 
 
-_CACHED_BUNDLE: Optional[ModelBundle] = None
+def get_model_bundle() -> ModelBundle:
+    """
+    Return the latest model bundle for reuse across multiple calls (Flask
+    services, FastAPI app, CLI, etc.).
+
+    Artifacts are only reloaded when training has rewritten them, so this is
+    cheap to call per request and picks up a retrained model.
+    """
+    return load_latest_model()
 
 
-def get_model_bundle() -> ModelBundle:
+def _as_model_input(X_trans):
+    """
+    Hand the transformed matrix to the estimator as contiguous float32, the
+    dtype tree models (sklearn and XGBoost) evaluate in, so predict does not
+    make its own converted copy. Sparse output stays sparse.
+    """
+    if hasattr(X_trans, "tocsr"):
+        return X_trans.tocsr().astype(np.float32)
+    return np.ascontiguousarray(X_trans, dtype=np.float32)
+
+
+def _map_row_chunks(fn, X) -> Tuple[np.ndarray, ...]:
+    """
+    Apply `fn`, which returns a tuple of per-row arrays, to the rows of `X`.
+    Batches larger than PREDICT_CHUNK_ROWS are split into row chunks run on a
+    thread pool (the per-chunk work is native code that releases the GIL)
+    and the results concatenated; rows are independent, so this matches a
+    single call.
+    """
+    n_rows = X.shape[0]
+    if n_rows <= PREDICT_CHUNK_ROWS:
+        return tuple(fn(X))
+
+    starts = range(0, n_rows, PREDICT_CHUNK_ROWS)
+    with ThreadPoolExecutor(max_workers=min(len(starts), os.cpu_count() or 1)) as pool:
+        parts = list(pool.map(lambda start: fn(X[start : start + PREDICT_CHUNK_ROWS]), starts))
+    return tuple(np.concatenate(p) for p in zip(*parts))
+
+
+def _welford_partial(trees, X_trans) -> Tuple[int, np.ndarray, np.ndarray]:
+    """
+    Accumulate (count, mean, M2) of the given trees' predictions online
+    (Welford), keeping two (n_rows,) arrays instead of a per-tree matrix.
+    """
+    mean = np.zeros(X_trans.shape[0], dtype=np.float64)
+    m2 = np.zeros_like(mean)
+    for k, tree in enumerate(trees, start=1):
+        p = tree.predict(X_trans)
+        delta = p - mean
+        mean += delta / k
+        m2 += delta * (p - mean)
+    return len(trees), mean, m2
+
+
+def _packed_welford_kernel(X, feature, threshold, left, right, missing_left, value, roots):
+    """
+    Traverse the packed trees starting at `roots` for every row of `X` and
+    accumulate the Welford mean/M2 of their leaf values. Mirrors sklearn's
+    dense tree traversal, including its routing of missing values.
+    """
+    n_rows = X.shape[0]
+    mean = np.zeros(n_rows)
+    m2 = np.zeros(n_rows)
+    # Tree-major order keeps one tree's nodes hot in cache across all rows.
+    for k in range(roots.shape[0]):
+        for i in range(n_rows):
+            node = roots[k]
+            while left[node] != -1:
+                x = X[i, feature[node]]
+                if np.isnan(x):
+                    node = left[node] if missing_left[node] else right[node]
+                elif x <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            delta = value[node] - mean[i]
+            mean[i] += delta / (k + 1)
+            m2[i] += delta * (value[node] - mean[i])
+    return mean, m2
+
+
+if njit is not None:
+    _packed_welford_kernel = njit(nogil=True, cache=True)(_packed_welford_kernel)
+
+
+# Packed node arrays per fitted sklearn forest, built on first use.
+_PACKED_FORESTS: "WeakKeyDictionary[object, Tuple[np.ndarray, ...]]" = WeakKeyDictionary()
+
+
+def _packed_forest(model) -> Optional[Tuple[np.ndarray, ...]]:
+    """
+    Concatenate the nodes of every tree in a single-output sklearn forest
+    into flat arrays (children re-based to global node ids) plus each
+    tree's root id, for `_packed_welford_kernel`. Returns None when Numba is
+    unavailable or the forest cannot be packed.
+    """
+    if njit is None or getattr(model, "n_outputs_", 1) != 1:
+        return None
+    packed = _PACKED_FORESTS.get(model)
+    if packed is not None:
+        return packed
+
+    trees = [getattr(est, "tree_", None) for est in model.estimators_]
+    if any(tree is None for tree in trees):
+        return None
+
+    sizes = np.array([tree.node_count for tree in trees], dtype=np.intp)
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+
+    def rebased(children, offset):
+        return np.where(children == -1, -1, children + offset)
+
+    packed = (
+        np.concatenate([tree.feature for tree in trees]).astype(np.intp),
+        np.concatenate([tree.threshold for tree in trees]),
+        np.concatenate([rebased(t.children_left, o) for t, o in zip(trees, roots)]).astype(np.intp),
+        np.concatenate([rebased(t.children_right, o) for t, o in zip(trees, roots)]).astype(np.intp),
+        np.concatenate(
+            [getattr(t, "missing_go_to_left", np.zeros(t.node_count)) for t in trees]
+        ).astype(np.bool_),
+        np.concatenate([tree.value[:, 0, 0] for tree in trees]).astype(np.float64),
+        roots,
+    )
+    _PACKED_FORESTS[model] = packed
+    return packed
+
+
+def _forest_mean_std(model, X_trans, n_jobs: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and sample standard deviation (ddof=1) of per-tree predictions of a
+    RandomForest-like ensemble, without materialising an (n_trees, n_rows)
+    matrix.
+
+    Large forests are split into one batch of trees per worker thread
+    (sklearn's tree predict runs in Cython without the GIL); the per-batch
+    Welford partials are merged with Chan's parallel update. When Numba is
+    installed and the input is dense, each batch is traversed by a compiled
+    kernel over packed node arrays instead of one predict call per tree.
+    Callers that already run this from a thread pool pass ``n_jobs=1``.
+    """
+    estimators = list(model.estimators_)
+    packed = _packed_forest(model) if isinstance(X_trans, np.ndarray) else None
+    if packed is None:
+        def partial(idx):
+            return _welford_partial([estimators[i] for i in idx], X_trans)
+    else:
+        def partial(idx):
+            return (len(idx),) + _packed_welford_kernel(X_trans, *packed[:-1], packed[-1][idx])
+
+    if n_jobs == 1 or len(estimators) < PARALLEL_TREES_MIN:
+        parts = [partial(np.arange(len(estimators)))]
+    else:
+        n_jobs = min(effective_n_jobs(n_jobs), len(estimators))
+        batches = [np.arange(i, len(estimators), n_jobs) for i in range(n_jobs)]
+        parts = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(partial)(batch) for batch in batches
+        )
+
+    count, mean, m2 = parts[0]
+    for count_b, mean_b, m2_b in parts[1:]:
+        total = count + count_b
+        delta = mean_b - mean
+        mean = mean + delta * (count_b / total)
+        m2 = m2 + m2_b + delta**2 * (count * count_b / total)
+        count = total
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(m2 / (count - 1))
+    return mean, std
+
+
+# Dense (n_trees, max_node_id + 1) leaf-value table per fitted XGBoost model.
+_XGB_LEAF_VALUES: "WeakKeyDictionary[object, np.ndarray]" = WeakKeyDictionary()
+
+
+def _xgb_leaf_values(model) -> np.ndarray:
+    """
+    Leaf values of every tree in an XGBoost model as a dense matrix indexed
+    by (tree, node id). Dumping the booster to a DataFrame is far costlier
+    than a prediction, so the table is built once per model and reused.
+    """
+    leaf_values = _XGB_LEAF_VALUES.get(model)
+    if leaf_values is None:
+        trees = model.get_booster().trees_to_dataframe()
+        leaf_rows = trees[trees["Feature"] == "Leaf"]
+        leaf_values = np.zeros((int(trees["Tree"].max()) + 1, int(trees["Node"].max()) + 1))
+        leaf_values[leaf_rows["Tree"].to_numpy(), leaf_rows["Node"].to_numpy()] = leaf_rows[
+            "Gain"
+        ].to_numpy()
+        _XGB_LEAF_VALUES[model] = leaf_values
+    return leaf_values
+
+
+def _xgb_leaf_contributions(model, X_trans) -> Tuple[float, np.ndarray]:
+    """
+    Return the base margin and the (n_rows, n_trees) matrix of per-tree
+    contributions of an XGBoost regressor, read off the leaf each row lands
+    in (`pred_leaf=True`).
+    """
+    import xgboost as xgb  # only reached for XGBoost models
+
+    booster = model.get_booster()
+    dmat = xgb.DMatrix(X_trans, missing=getattr(model, "missing", np.nan))
+    leaves = booster.predict(dmat, pred_leaf=True).astype(np.intp)
+    if leaves.ndim == 1:
+        leaves = leaves[:, np.newaxis]
+    n_trees = leaves.shape[1]
+
+    leaf_values = _xgb_leaf_values(model)
+    contrib = leaf_values[np.arange(n_trees), leaves]  # (n_rows, n_trees)
+    if contrib.shape[0] == 0:
+        return 0.0, contrib
+
+    # The base margin is the same for every row, so one row's full margin
+    # recovers it; a second traversal of the whole batch is not needed.
+    base_margin = booster.predict(dmat.slice([0]), output_margin=True)[0] - contrib[0].sum()
+    return float(base_margin), contrib
+
+
+def _xgb_staged_predictions(model, X_trans) -> np.ndarray:
+    """
+    Return the (n_trees, n_rows) matrix of cumulative predictions after each
+    tree of an XGBoost regressor, in a single pass over the ensemble.
+
+    The staged predictions are the base margin plus the running sum of the
+    per-tree contributions. This replaces re-predicting every prefix of the
+    ensemble, which is quadratic in the number of trees.
+    """
+    base_margin, contrib = _xgb_leaf_contributions(model, X_trans)
+    return (base_margin + np.cumsum(contrib, axis=1)).T
+
+
+def _staged_welford_kernel(base_margin, contrib):
     """
-    Lazily load and cache the latest model bundle for reuse across
-    multiple calls (Flask services, FastAPI app, CLI, etc.).
+    Welford mean/M2 over the running sums `base_margin + cumsum(contrib)`
+    of each row, without materialising the staged matrix.
+    """
+    n_rows, n_trees = contrib.shape
+    mean = np.zeros(n_rows)
+    m2 = np.zeros(n_rows)
+    for i in range(n_rows):
+        staged = base_margin
+        mu = 0.0
+        acc = 0.0
+        for k in range(n_trees):
+            staged += contrib[i, k]
+            delta = staged - mu
+            mu += delta / (k + 1)
+            acc += delta * (staged - mu)
+        mean[i] = mu
+        m2[i] = acc
+    return mean, m2
+
+
+if njit is not None:
+    _staged_welford_kernel = njit(nogil=True, cache=True)(_staged_welford_kernel)
+
+
+def _xgb_staged_mean_std(model, X_trans) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and sample standard deviation (ddof=1) of an XGBoost model's staged
+    predictions. With Numba the cumulative sums are reduced in one fused
+    pass per row; otherwise the staged matrix is built and reduced.
 
-    This ensures we do not reload the model artifacts on every request.
+    XGBoost parallelises the leaf lookup itself, so only the reduction of
+    large batches is split into row chunks across a thread pool.
     """
-    global _CACHED_BUNDLE
-    if _CACHED_BUNDLE is None:
-        _CACHED_BUNDLE = load_latest_model()
-    return _CACHED_BUNDLE
+    if njit is None:
+        all_preds = _xgb_staged_predictions(model, X_trans)
+        return all_preds.mean(axis=0), all_preds.std(axis=0, ddof=1)
+
+    base_margin, contrib = _xgb_leaf_contributions(model, X_trans)
+    mean, m2 = _map_row_chunks(lambda rows: _staged_welford_kernel(base_margin, rows), contrib)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(m2 / (contrib.shape[1] - 1))
+    return mean, std
 
 
 def _tree_based_confidence_interval(
-    model, X_trans: np.ndarray
+    model, X_trans: np.ndarray, n_jobs: int = -1
 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Estimate prediction mean, lower, and upper bounds using tree ensemble
@@ -70,16 +392,11 @@ def _tree_based_confidence_interval(
     """
     if hasattr(model, "estimators_"):
         # RandomForest-like
-        all_preds = np.stack([tree.predict(X_trans) for tree in model.estimators_], axis=0)
+        mean_pred, std_pred = _forest_mean_std(model, X_trans, n_jobs=n_jobs)
     elif hasattr(model, "get_booster"):
-        # XGBoost: use individual trees via predict with output_margin disabled and ntree_limit
-        booster = model.get_booster()
-        n_trees = len(booster.get_dump())
-        all_preds = []
-        for i in range(1, n_trees + 1):
-            preds = model.predict(X_trans, iteration_range=(0, i))
-            all_preds.append(preds)
-        all_preds = np.stack(all_preds, axis=0)
+        # XGBoost: prediction after each boosting round, i.e. what
+        # predict(iteration_range=(0, i)) returns for every i.
+        mean_pred, std_pred = _xgb_staged_mean_std(model, X_trans)
     else:
         # Fallback: no per-estimator info; assume fixed uncertainty
         mean_pred = model.predict(X_trans)
@@ -88,13 +405,47 @@ def _tree_based_confidence_interval(
         ci_high = mean_pred + 1.96 * std
         return mean_pred, ci_low, ci_high
 
-    mean_pred = all_preds.mean(axis=0)
-    std_pred = all_preds.std(axis=0, ddof=1)
     ci_low = mean_pred - 1.96 * std_pred
     ci_high = mean_pred + 1.96 * std_pred
     return mean_pred, ci_low, ci_high
 
 
+def _chunked_confidence_interval(
+    model, X_trans
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run `_tree_based_confidence_interval` over row chunks in parallel for
+    large batches of a RandomForest-like model. Rows are predicted
+    independently, so results match a single call; each chunk walks the
+    trees serially so the pool is not nested inside joblib's.
+
+    Other models go through in one call: XGBoost chunks its own reduction,
+    and the fallback spread is a statistic of the whole batch.
+    """
+    # Small batches keep joblib's per-tree parallelism instead.
+    if X_trans.shape[0] <= PREDICT_CHUNK_ROWS or not hasattr(model, "estimators_"):
+        return _tree_based_confidence_interval(model, X_trans)
+
+    mean_pred, ci_low, ci_high = _map_row_chunks(
+        lambda rows: _tree_based_confidence_interval(model, rows, n_jobs=1), X_trans
+    )
+    return mean_pred, ci_low, ci_high
+
+
+def _residual_confidence_interval(
+    model, X_trans, residual_std
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Interval from a single point prediction and the model's held-out
+    residual spread (scalar or per-row), instead of per-tree variability.
+    Costs one predict call regardless of ensemble size.
+    """
+    mean_pred = np.asarray(model.predict(X_trans), dtype=np.float64)
+    ci_low = mean_pred - 1.96 * residual_std
+    ci_high = mean_pred + 1.96 * residual_std
+    return mean_pred, ci_low, ci_high
+
+
 def _confidence_and_risk_from_interval(
     mean_pred: np.ndarray,
     ci_low: np.ndarray,
@@ -104,10 +455,11 @@ def _confidence_and_risk_from_interval(
     with np.errstate(divide="ignore", invalid="ignore"):
         rel_width = np.where(mean_pred != 0, width / np.abs(mean_pred), width)
 
-    dummy = np.zeros_like(rel_width)
-    risk = np.full_like(dummy, fill_value="Moderate", dtype=object)
-    risk[rel_width <= 0.15] = "Low"
-    risk[rel_width >= 0.35] = "High"
+    risk = np.select(
+        [rel_width <= 0.15, rel_width >= 0.35],
+        np.array(["Low", "High"], dtype=object),
+        default=np.array("Moderate", dtype=object),
+    )
     # Second return value is kept for backward-compatibility with callers.
     return rel_width, risk
 
@@ -144,9 +496,44 @@ def _compute_scenario_confidence(
     return conf
 
 
+def _assemble_results(
+    scenarios: pd.DataFrame,
+    mean_pred: np.ndarray,
+    ci_low: np.ndarray,
+    ci_high: np.ndarray,
+    confidence: np.ndarray,
+    risk_level: np.ndarray,
+    evidence_level: np.ndarray,
+) -> pd.DataFrame:
+    """
+    Append the prediction columns (and the total production estimate when
+    an Area column is present) to `scenarios` with a single concat, instead
+    of copying the frame and inserting the columns one at a time.
+    """
+    extras: Dict[str, np.ndarray] = {
+        "predicted_yield": mean_pred,
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "confidence": confidence,
+        "risk_level": risk_level,
+        "evidence_level": evidence_level,
+    }
+
+    # Optional: compute total production estimate for the given field area.
+    if "Area" in scenarios.columns:
+        try:
+            extras["estimated_total_yield"] = mean_pred * scenarios["Area"].astype(float).to_numpy()
+        except Exception:
+            pass
+
+    base = scenarios.drop(columns=[c for c in extras if c in scenarios.columns])
+    return pd.concat([base, pd.DataFrame(extras, index=scenarios.index)], axis=1)
+
+
 def batch_predict(
     bundle: ModelBundle,
     scenarios: pd.DataFrame,
+    fast_ci: bool = False,
 ) -> pd.DataFrame:
     """
     Run batch prediction for a set of farming scenarios and compute
@@ -155,6 +542,11 @@ def batch_predict(
     Supports both:
     - Unified model (single Pipeline for all districts) — new default
     - Per-district dict of Pipelines — legacy backward compat
+
+    With `fast_ci=True`, intervals come from the residual std recorded at
+    training time (per district where available) and a single predict call,
+    skipping per-tree predictions. Models trained before residual std was
+    recorded fall back to the per-tree intervals.
     """
     model = bundle.model
     preprocessor = bundle.preprocessor
@@ -245,11 +637,31 @@ def batch_predict(
 
     if is_unified and unified_pipeline is not None:
         # ── UNIFIED MODEL PATH ──
-        X_trans = unified_pipeline.named_steps["preprocessor"].transform(X_full)
-        mean_pred, ci_low, ci_high = _tree_based_confidence_interval(
-            unified_pipeline.named_steps["model"],
-            X_trans,
+        per_district = bundle.metadata.get("per_district", {})
+        global_metrics = bundle.metadata.get("global_metrics", {})
+
+        X_trans = _as_model_input(
+            unified_pipeline.named_steps["preprocessor"].transform(X_full)
         )
+        if fast_ci and "residual_std" in global_metrics:
+            residual_std = np.full(len(X_full), float(global_metrics["residual_std"]))
+            if "district" in X_full.columns:
+                district_std = (
+                    X_full["district"].astype(str).str.strip().str.title()
+                    .map({d: m.get("residual_std") for d, m in per_district.items()})
+                    .to_numpy(dtype=np.float64, na_value=np.nan)
+                )
+                residual_std = np.where(np.isnan(district_std), residual_std, district_std)
+            mean_pred, ci_low, ci_high = _residual_confidence_interval(
+                unified_pipeline.named_steps["model"],
+                X_trans,
+                residual_std,
+            )
+        else:
+            mean_pred, ci_low, ci_high = _chunked_confidence_interval(
+                unified_pipeline.named_steps["model"],
+                X_trans,
+            )
 
         if use_log1p:
             mean_pred = np.expm1(mean_pred)
@@ -261,8 +673,6 @@ def batch_predict(
         )
 
         # Use per-district confidence if available, else global
-        per_district = bundle.metadata.get("per_district", {})
-        global_metrics = bundle.metadata.get("global_metrics", {})
         global_conf = float(global_metrics.get("confidence_pct", 50.0))
 
         # Compute per-row confidence using district-specific or global CV
@@ -286,48 +696,57 @@ def batch_predict(
             district_weight = cv_conf_array[i] / max(global_conf, 1.0)
             scenario_conf[i] = np.clip(scenario_conf[i] * district_weight, 5.0, 98.0)
 
-        results = scenarios.copy()
-        results["predicted_yield"] = mean_pred
-        results["ci_low"] = ci_low
-        results["ci_high"] = ci_high
-        results["confidence"] = scenario_conf
-        results["risk_level"] = risk_level
-
         # Evidence level based on whether district was in training data
-        results["evidence_level"] = "High"
-        if "district" in results.columns:
+        evidence_level = np.full(len(scenarios), "High", dtype=object)
+        if "district" in scenarios.columns:
             trained_districts = set(per_district.keys())
             if trained_districts:
-                results.loc[
-                    ~results["district"].astype(str).str.title().isin(trained_districts),
-                    "evidence_level",
+                evidence_level[
+                    ~scenarios["district"].astype(str).str.title().isin(trained_districts).to_numpy()
                 ] = "Low"
 
+        results = _assemble_results(
+            scenarios, mean_pred, ci_low, ci_high, scenario_conf, risk_level, evidence_level
+        )
+
     elif isinstance(model, dict):
         # ── LEGACY PER-DISTRICT DICT PATH ──
         if "district" not in X_full.columns:
             raise ValueError("district column is required for district-specific models.")
 
         per_district = bundle.metadata.get("per_district", {})
-        out_parts: list[pd.DataFrame] = []
-
-        for d, group in X_full.groupby("district", sort=False):
-            d_norm = str(d).strip().title()
-            district_model = model.get(d_norm)
-
-            evidence_level = "High"
-            if district_model is None:
-                fallback_key = "Mysuru" if "Mysuru" in model else next(iter(model.keys()))
-                district_model = model[fallback_key]
-                d_norm = fallback_key
-                evidence_level = "Low"
-
-            X_sub = group
-            X_trans = district_model.named_steps["preprocessor"].transform(X_sub)
-            mean_pred, ci_low, ci_high = _tree_based_confidence_interval(
-                district_model.named_steps["model"],
-                X_trans,
+        n_rows = len(X_full)
+        pred_out = np.empty(n_rows)
+        low_out = np.empty(n_rows)
+        high_out = np.empty(n_rows)
+        conf_out = np.empty(n_rows)
+        risk_out = np.empty(n_rows, dtype=object)
+
+        # Resolve each row's model up front so districts without their own
+        # model share one transform/predict call on the fallback model.
+        district_norm = X_full["district"].astype(str).str.strip().str.title()
+        has_model = district_norm.isin(list(model.keys())).to_numpy()
+        fallback_key = "Mysuru" if "Mysuru" in model else next(iter(model.keys()))
+        model_keys = np.where(has_model, district_norm.to_numpy(), fallback_key)
+
+        for d_norm, pos in X_full.groupby(model_keys, sort=False).indices.items():
+            district_model = model[d_norm]
+            X_sub = X_full.iloc[pos]
+            X_trans = _as_model_input(
+                district_model.named_steps["preprocessor"].transform(X_sub)
             )
+            meta = per_district.get(d_norm, {})
+            if fast_ci and "residual_std" in meta:
+                mean_pred, ci_low, ci_high = _residual_confidence_interval(
+                    district_model.named_steps["model"],
+                    X_trans,
+                    float(meta["residual_std"]),
+                )
+            else:
+                mean_pred, ci_low, ci_high = _chunked_confidence_interval(
+                    district_model.named_steps["model"],
+                    X_trans,
+                )
 
             if use_log1p:
                 mean_pred = np.expm1(mean_pred)
@@ -338,34 +757,38 @@ def batch_predict(
                 mean_pred, ci_low, ci_high
             )
 
-            meta = per_district.get(d_norm, {})
             cv_conf = float(meta.get("confidence_pct", 50.0))
             cv_conf = float(np.clip(cv_conf, 0.0, 100.0))
             scenario_conf = _compute_scenario_confidence(
                 mean_pred, ci_low, ci_high, cv_conf
             )
 
-            res = scenarios.loc[X_sub.index].copy()
-            res["predicted_yield"] = mean_pred
-            res["ci_low"] = ci_low
-            res["ci_high"] = ci_high
-            res["confidence"] = scenario_conf
-            res["risk_level"] = risk_level
-            res["evidence_level"] = evidence_level
-
-            out_parts.append(res)
-
-        results = pd.concat(out_parts, axis=0).loc[scenarios.index]
+            # Scatter back into row order rather than concat + reindex.
+            pred_out[pos] = mean_pred
+            low_out[pos] = ci_low
+            high_out[pos] = ci_high
+            conf_out[pos] = scenario_conf
+            risk_out[pos] = risk_level
+
+        results = _assemble_results(
+            scenarios,
+            pred_out,
+            low_out,
+            high_out,
+            conf_out,
+            risk_out,
+            np.where(has_model, "High", "Low").astype(object),
+        )
     else:
         # Fallback: single model with separate preprocessor
         if hasattr(model, "predict") and preprocessor is not None:
-            X_trans = preprocessor.transform(X_full)
-            mean_pred, ci_low, ci_high = _tree_based_confidence_interval(
+            X_trans = _as_model_input(preprocessor.transform(X_full))
+            mean_pred, ci_low, ci_high = _chunked_confidence_interval(
                 model.named_steps.get("model", model),
                 X_trans,
             )
         else:
-            mean_pred, ci_low, ci_high = _tree_based_confidence_interval(
+            mean_pred, ci_low, ci_high = _chunked_confidence_interval(
                 model, X_full
             )
 
@@ -395,29 +818,18 @@ def batch_predict(
             mean_pred, ci_low, ci_high, cv_conf
         )
 
-        results = scenarios.copy()
-        results["predicted_yield"] = mean_pred
-        results["ci_low"] = ci_low
-        results["ci_high"] = ci_high
-        results["confidence"] = scenario_conf
-        results["risk_level"] = risk_level
-        results["evidence_level"] = "High"
+        evidence_level = np.full(len(scenarios), "High", dtype=object)
         if "district" in scenarios.columns:
             seen = set(
                 bundle.metadata.get("references", {})
                 .get("weather_by_district_season", {})
                 .keys()
             )
-            results.loc[~results["district"].astype(str).str.title().isin(seen), "evidence_level"] = "Low"
+            evidence_level[~scenarios["district"].astype(str).str.title().isin(seen).to_numpy()] = "Low"
 
-    # Optional: compute total production estimate for the given field area.
-    if "Area" in results.columns:
-        try:
-            results["estimated_total_yield"] = (
-                results["predicted_yield"] * results["Area"].astype(float)
-            )
-        except Exception:
-            pass
+        results = _assemble_results(
+            scenarios, mean_pred, ci_low, ci_high, scenario_conf, risk_level, evidence_level
+        )
 
     return results
 
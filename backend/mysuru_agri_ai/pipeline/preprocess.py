@@ -1,9 +1,12 @@
 import json
 import logging
+import os
+import re
+import tempfile
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 
 import numpy as np
 import pandas as pd
@@ -13,6 +16,37 @@ from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
 logger = logging.getLogger(__name__)
 
+# Mode a plain open() would create files with; os.umask can only be read by
+# setting it, so it is sampled once at import.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_FILE_MODE = 0o666 & ~_UMASK
+
+
+def normalize_missing_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace the None that pyarrow (CSV parser or Parquet reader) returns for
+    missing strings with the NaN pandas' C parser produces, so downstream
+    `astype(str)` cleaning sees the same values either way. Modifies and
+    returns `df`.
+    """
+    object_cols = df.select_dtypes(include="object").columns
+    if len(object_cols):
+        df[object_cols] = df[object_cols].fillna(np.nan)
+    return df
+
+
+def _read_csv(path: Path) -> pd.DataFrame:
+    """
+    Read a CSV with pyarrow's multi-threaded parser when it is installed,
+    falling back to pandas' C parser.
+    """
+    try:
+        df = pd.read_csv(path, engine="pyarrow")
+    except (ImportError, ValueError):
+        return pd.read_csv(path)
+    return normalize_missing_strings(df)
+
 
 def _ensure_datetime(df: pd.DataFrame, column: str) -> pd.Series:
     if not np.issubdtype(df[column].dtype, np.datetime64):
@@ -31,6 +65,11 @@ def map_month_to_season(month: int) -> str:
     return "Summer"
 
 
+# Season label per month number, for vectorised lookup. Index 0 stands in for
+# a missing month and, like map_month_to_season(NaN), maps to "Summer".
+_SEASON_BY_MONTH = np.array([map_month_to_season(m) for m in range(13)], dtype=object)
+
+
 def load_weather_data(path: Path, district: str = "Mysuru") -> pd.DataFrame:
     """
     Load and clean daily weather data, aggregating to seasonal features.
@@ -45,7 +84,7 @@ def load_weather_data(path: Path, district: str = "Mysuru") -> pd.DataFrame:
     - solarradiation
     """
     logger.info("Loading weather data from %s", path)
-    df = pd.read_csv(path)
+    df = _read_csv(path)
 
     # Normalise column names for case-insensitive matching
     original_cols = list(df.columns)
@@ -66,7 +105,7 @@ def load_weather_data(path: Path, district: str = "Mysuru") -> pd.DataFrame:
     _ensure_datetime(df, datetime_col)
     df["year"] = df[datetime_col].dt.year
     df["month"] = df[datetime_col].dt.month
-    df["Season"] = df["month"].apply(map_month_to_season)
+    df["Season"] = _SEASON_BY_MONTH[df["month"].fillna(0).to_numpy(dtype=np.intp)]
 
     # Resolve core numeric fields with flexible naming
     def resolve(name_candidates):
@@ -118,8 +157,9 @@ def load_weather_data(path: Path, district: str = "Mysuru") -> pd.DataFrame:
                 f"column. Available columns: {original_cols}"
             )
 
-    # Basic cleaning — only require columns that actually exist
-    df = df.drop_duplicates()
+    # Basic cleaning — only require columns that actually exist. Rows are
+    # daily readings, so the timestamp alone identifies a duplicate.
+    df = df.drop_duplicates(subset=[datetime_col])
     required_cols = [c for c in [temp_col, humid_col, precip_col, wind_col, solar_col] if c is not None]
     df = df.dropna(subset=required_cols, how="any")
 
@@ -136,21 +176,17 @@ def load_weather_data(path: Path, district: str = "Mysuru") -> pd.DataFrame:
     if wind_col is not None:
         agg_dict["avg_windspeed"] = (wind_col, "mean")
 
-    seasonal = (
-        df.groupby(["year", "Season"], as_index=False)
-        .agg(**agg_dict)
-        .reset_index(drop=True)
-    )
-
     # Extreme heat days (>35C) using temp_max if present, else avg temp.
+    # Counted in the same groupby pass as the other seasonal aggregates.
     heat_source = tempmax_col if tempmax_col is not None else temp_col
-    heat_days = (
+    agg_dict["extreme_heat_days"] = ("_hot", "sum")
+
+    seasonal = (
         df.assign(_hot=(df[heat_source] > 35.0).astype(int))
-        .groupby(["year", "Season"], as_index=False)["_hot"]
-        .sum()
-        .rename(columns={"_hot": "extreme_heat_days"})
+        .groupby(["year", "Season"], as_index=False)
+        .agg(**agg_dict)
+        .reset_index(drop=True)
     )
-    seasonal = seasonal.merge(heat_days, on=["year", "Season"], how="left")
     seasonal["rainfall_variability"] = seasonal["rainfall_variability"].fillna(0.0)
     seasonal["extreme_heat_days"] = seasonal["extreme_heat_days"].fillna(0.0)
 
@@ -186,16 +222,39 @@ def load_crop_management_data(path: Path, district: str = "Mysuru") -> pd.DataFr
     - yeilds
     """
     logger.info("Loading crop management data from %s", path)
-    df = pd.read_csv(path)
+    return filter_crop_management_data(read_crop_management_raw(path), district=district)
+
+
+def read_crop_management_raw(path: Path) -> pd.DataFrame:
+    """
+    Read the crop management CSV with normalised column names but no
+    district filtering or cleaning.
+    """
+    df = _read_csv(path)
 
     # Normalise column names for robustness
     df.columns = [c.strip() for c in df.columns]
+    return df
 
-    # Filter by district using the Location column when present.
-    filtered = df.copy()
+
+def filter_crop_management_data(df: pd.DataFrame, district: str = "Mysuru") -> pd.DataFrame:
+    """
+    Filter a raw crop management frame (see `read_crop_management_raw`) to
+    the given district and clean its key columns. `df` may be modified.
+    """
+    # Filter by district using the Location column when present. Locations
+    # repeat heavily, so the pattern is searched once per distinct value and
+    # the result broadcast back through the factorized codes.
+    filtered = df
     if "Location" in filtered.columns and district:
-        mask = filtered["Location"].astype(str).str.contains(district, case=False, na=False)
-        matched = filtered.loc[mask].copy()
+        codes, locations = pd.factorize(filtered["Location"].astype(str))
+        pattern = re.compile(district, re.IGNORECASE)
+        location_match = np.fromiter(
+            (pattern.search(loc) is not None for loc in locations),
+            dtype=bool,
+            count=len(locations),
+        )
+        matched = filtered.loc[location_match[codes]].copy()
         if matched.empty:
             logger.warning(
                 "No rows matched district '%s' in Location; using full dataset.", district
@@ -224,7 +283,7 @@ def load_crop_management_all(path: Path) -> pd.DataFrame:
     models without hardcoding district names.
     """
     logger.info("Loading crop management data (all districts) from %s", path)
-    df = pd.read_csv(path)
+    df = _read_csv(path)
     df.columns = [c.strip() for c in df.columns]
 
     df = df.drop_duplicates()
@@ -254,7 +313,7 @@ def load_pune_nutrient_features(path: Path) -> pd.DataFrame:
     pH estimate.
     """
     logger.info("Loading Pune nutrient data from %s", path)
-    df = pd.read_csv(path)
+    df = _read_csv(path)
     df.columns = [c.strip() for c in df.columns]
 
     required = {
@@ -297,7 +356,7 @@ def load_pune_soil_types(path: Path) -> pd.DataFrame:
     Taluka -> Soil type (dominant).
     """
     logger.info("Loading Pune soil types from %s", path)
-    df = pd.read_csv(path)
+    df = _read_csv(path)
     df.columns = [c.strip() for c in df.columns]
     if not {"Taluka", "Dominant_Soil_Type"}.issubset(df.columns):
         raise ValueError("pune_taluka_soil_types.csv must contain Taluka and Dominant_Soil_Type.")
@@ -337,7 +396,7 @@ def load_pune_yield_labels(data_dir: Path) -> pd.DataFrame:
         return pd.DataFrame()
 
     logger.info("Loading Pune yield labels from %s", path)
-    df = pd.read_csv(path)
+    df = _read_csv(path)
     df.columns = [c.strip() for c in df.columns]
     lower_map = {c.lower().strip(): c for c in df.columns}
 
@@ -410,7 +469,7 @@ def load_soil_nutrient_data(path: Path) -> pd.DataFrame:
     - N, P, K, temperature, humidity, ph, rainfall, label
     """
     logger.info("Loading soil nutrient data from %s", path)
-    df = pd.read_csv(path)
+    df = _read_csv(path)
     df.columns = [c.strip() for c in df.columns]
 
     if "label" not in df.columns:
@@ -616,10 +675,11 @@ def build_feature_matrix(
         if col in NUMERIC_WHITELIST
     ]
 
-    numeric_means: Dict[str, float] = {}
-    for col in numeric_cols:
-        merged[col] = merged[col].fillna(merged[col].median())
-        numeric_means[col] = float(merged[col].mean())
+    # Median-impute and take means for all numeric features in one pass each.
+    merged[numeric_cols] = merged[numeric_cols].fillna(merged[numeric_cols].median())
+    numeric_means: Dict[str, float] = {
+        col: float(mean) for col, mean in merged[numeric_cols].mean().items()
+    }
 
     # Minimal rainfall statistics for later risk analysis.
     rainfall_cols = [c for c in numeric_cols if "rainfall" in c.lower() or "rain" in c.lower()]
@@ -750,6 +810,26 @@ def build_preprocessor(feature_spec: FeatureSpec) -> ColumnTransformer:
     return preprocessor
 
 
+def atomic_write(path: Path, write: Callable[[str], None]) -> None:
+    """
+    Create `path` by calling `write` on a temporary file in the same
+    directory and swapping it in with `os.replace`. Readers never see a
+    partly written file, and a process that has the old file memory-mapped
+    keeps its inode. The file gets the umask-derived mode of a plain open()
+    rather than mkstemp's 0600.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.chmod(tmp_path, _FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
 def save_metadata(metadata: Dict, models_dir: Path, version: str) -> None:
     """
     Persist training metadata and feature configuration for reproducibility.
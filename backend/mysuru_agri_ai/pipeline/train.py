@@ -1,23 +1,32 @@
 import logging
 import os
+import tempfile
 from datetime import datetime
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, Tuple
 
 import joblib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from joblib import Memory, Parallel, delayed, effective_n_jobs
 try:  # SHAP is optional; some numpy/python combos are incompatible
     import shap  # type: ignore[import]
 except Exception:  # pragma: no cover - defensive
     shap = None
+from sklearn.base import clone
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import RandomizedSearchCV, cross_val_score, train_test_split
+from sklearn.model_selection import (
+    RandomizedSearchCV,
+    cross_val_score,
+    cross_validate,
+    train_test_split,
+)
 from sklearn.pipeline import Pipeline
 from xgboost import XGBRegressor
 
 from .preprocess import (
+    atomic_write,
     build_district_reference_tables,
     build_feature_matrix,
     build_preprocessor,
@@ -36,11 +45,31 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = PROJECT_ROOT / "data"
 MODELS_DIR = PROJECT_ROOT / "models"
 
+# Parent of the per-run scratch directories for memoized preprocessor fits
+# during the hyperparameter search; RAM-backed /dev/shm when available.
+_SCRATCH_ROOT = Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+PIPE_CACHE_ROOT = Path(os.getenv("MYSURU_AGRI_PIPE_CACHE", _SCRATCH_ROOT))
+
 
 def _get_version_stamp() -> str:
     return datetime.utcnow().strftime("v%Y%m%d%H%M%S")
 
 
+def _dump_artifact(obj, name: str, version: str) -> None:
+    """
+    Write `obj` as both `{name}_{version}.pkl` and `{name}.pkl`.
+
+    Artifacts are stored uncompressed with pickle protocol 5 so predict.py
+    can memory-map their numpy buffers (`mmap_mode="r"`) instead of copying
+    them into every worker process. Because a running server may hold the
+    current files memory-mapped, each file is written with `atomic_write`,
+    so mapped readers keep the old inode instead of seeing it rewritten
+    underneath them.
+    """
+    for path in (MODELS_DIR / f"{name}_{version}.pkl", MODELS_DIR / f"{name}.pkl"):
+        atomic_write(path, lambda tmp_path: joblib.dump(obj, tmp_path, compress=0, protocol=5))
+
+
 def _evaluate_predictions(y_true, y_pred) -> Tuple[float, float, float]:
     r2 = r2_score(y_true, y_pred)
     mae = mean_absolute_error(y_true, y_pred)
@@ -48,6 +77,78 @@ def _evaluate_predictions(y_true, y_pred) -> Tuple[float, float, float]:
     return r2, mae, rmse
 
 
+def _district_metrics(
+    Xd: pd.DataFrame,
+    yd: pd.Series,
+    y_pred_d: np.ndarray,
+    cv_model,
+    use_log1p: bool,
+    cv_r2_global: float,
+    cv_r2_std_global: float,
+    n_jobs: int,
+) -> Dict[str, float]:
+    """
+    Score the unified model on one district's rows: in-sample fit metrics
+    from its predictions `y_pred_d`, per-district CV of the unfitted
+    `cv_model` (falling back to the global CV for tiny subsets), the
+    out-of-fold residual std (None for tiny subsets, so predict.py uses the
+    global one), and the derived confidence percentage.
+    """
+    if use_log1p:
+        yd_eval = np.expm1(yd)
+        y_pred_d_eval = np.expm1(y_pred_d)
+    else:
+        yd_eval = yd
+        y_pred_d_eval = y_pred_d
+
+    r2_d, mae_d, rmse_d = _evaluate_predictions(yd_eval, y_pred_d_eval)
+
+    # Per-district cross-validation using the unified model. The fold
+    # estimators also give out-of-fold predictions, so the residual spread
+    # used for fast intervals is not shrunk by in-sample fit.
+    residual_std_d = None
+    if len(Xd) >= 20:
+        n_cv = min(5, len(Xd) // 4)
+        cv_res = cross_validate(
+            cv_model,
+            Xd,
+            yd,
+            cv=n_cv,
+            scoring="r2",
+            n_jobs=n_jobs,
+            return_estimator=True,
+            return_indices=True,
+        )
+        cv_d = cv_res["test_score"]
+        cv_r2_d = float(cv_d.mean())
+        cv_r2_std_d = float(cv_d.std(ddof=1)) if len(cv_d) > 1 else 0.0
+
+        y_oof = np.empty(len(yd), dtype=np.float64)
+        for est, test_idx in zip(cv_res["estimator"], cv_res["indices"]["test"]):
+            y_oof[test_idx] = est.predict(Xd.iloc[test_idx])
+        residual_std_d = float(np.std(np.asarray(yd) - y_oof, ddof=1))
+    else:
+        cv_r2_d = cv_r2_global  # fall back to global for tiny subsets
+        cv_r2_std_d = cv_r2_std_global
+
+    # ── PHASE 3.1: Refined Per-District Confidence ──
+    # Again, use a weighted average of localized Test R2 and localized CV R2.
+    # This is more accurate than pure CV for small datasets.
+    reliability_d = (0.7 * r2_d) + (0.3 * cv_r2_d)
+    confidence_d = float(max(min((reliability_d + 0.5) * 100, 95), 10))
+
+    return {
+        "n_rows": int(len(Xd)),
+        "cv_r2_mean": cv_r2_d,
+        "cv_r2_std": cv_r2_std_d,
+        "confidence_pct": confidence_d,
+        "test_r2": float(r2_d),
+        "mae": float(mae_d),
+        "rmse": float(rmse_d),
+        "residual_std": residual_std_d,
+    }
+
+
 def _plot_feature_importance(
     model, feature_names, out_path: Path, title: str = "Feature importance"
 ) -> None:
@@ -196,11 +297,20 @@ def train_models(district: str = "Mysuru") -> None:
         "model__gamma": [0.0, 0.1, 0.5],              # min split loss
     }
 
+    # Only model__* params are searched, so the fitted preprocessor is the
+    # same for every candidate on a given fold; memoize it instead of
+    # refitting it n_iter times per fold. Each run gets its own directory so
+    # concurrent runs never clear each other's cache; it is also removed if
+    # the run fails.
+    PIPE_CACHE_ROOT.mkdir(parents=True, exist_ok=True)
+    pipe_cache_dir = tempfile.TemporaryDirectory(prefix="mysuru_pipe_cache_", dir=PIPE_CACHE_ROOT)
+    pipe_cache = Memory(pipe_cache_dir.name, verbose=0)
     pipe = Pipeline(
         steps=[
             ("preprocessor", preprocessor),
             ("model", base_model),
-        ]
+        ],
+        memory=pipe_cache,
     )
 
     search = RandomizedSearchCV(
@@ -262,6 +372,9 @@ def train_models(district: str = "Mysuru") -> None:
         y_test_eval = y_test
         y_pred_eval = y_pred
     r2_global, mae_global, rmse_global = _evaluate_predictions(y_test_eval, y_pred_eval)
+    # Held-out residual spread in the training target space; predict.py uses
+    # it for cheap intervals (batch_predict(..., fast_ci=True)).
+    residual_std_global = float(np.std(np.asarray(y_test) - y_pred, ddof=1))
 
     # Global CV on full dataset
     cv_scores_global = cross_val_score(best_model, X, y_for_training, cv=5, scoring="r2", n_jobs=-1)
@@ -286,73 +399,61 @@ def train_models(district: str = "Mysuru") -> None:
 
     # ── Per-district metrics for monitoring and confidence scoring ──
     per_district_meta = {}
-    districts = sorted(X["district"].astype(str).str.title().unique().tolist()) if "district" in X.columns else ["Unknown"]
-
-    for d in districts:
-        mask = X["district"].astype(str).str.title() == d
-        Xd = X.loc[mask]
-        yd = y_for_training.loc[mask]
-
-        if len(Xd) < 10:
-            continue
-
-        # Predict on the district subset using the unified model
-        y_pred_d = best_model.predict(Xd)
-        if use_log1p:
-            yd_eval = np.expm1(yd)
-            y_pred_d_eval = np.expm1(y_pred_d)
-        else:
-            yd_eval = yd
-            y_pred_d_eval = y_pred_d
-
-        r2_d, mae_d, rmse_d = _evaluate_predictions(yd_eval, y_pred_d_eval)
-
-        # Per-district cross-validation using the unified model
-        if len(Xd) >= 20:
-            n_cv = min(5, len(Xd) // 4)
-            cv_d = cross_val_score(best_model, Xd, yd, cv=n_cv, scoring="r2", n_jobs=-1)
-            cv_r2_d = float(cv_d.mean())
-            cv_r2_std_d = float(cv_d.std(ddof=1)) if len(cv_d) > 1 else 0.0
-        else:
-            cv_r2_d = cv_r2_global  # fall back to global for tiny subsets
-            cv_r2_std_d = cv_r2_std_global
-
-        # ── PHASE 3.1: Refined Per-District Confidence ──
-        # Again, use a weighted average of localized Test R2 and localized CV R2.
-        # This is more accurate than pure CV for small datasets.
-        reliability_d = (0.7 * r2_d) + (0.3 * cv_r2_d)
-        confidence_d = float(max(min((reliability_d + 0.5) * 100, 95), 10))
-
-        per_district_meta[d] = {
-            "n_rows": int(len(Xd)),
-            "cv_r2_mean": cv_r2_d,
-            "cv_r2_std": cv_r2_std_d,
-            "confidence_pct": confidence_d,
-            "test_r2": float(r2_d),
-            "mae": float(mae_d),
-            "rmse": float(rmse_d),
-        }
+    district_title = X["district"].astype(str).str.title() if "district" in X.columns else None
+    districts = sorted(district_title.unique().tolist()) if district_title is not None else ["Unknown"]
+    # Rows are predicted independently, so one pass over X (using XGBoost's
+    # own threads) gives every district's in-sample predictions.
+    y_pred_all = best_model.predict(X)
+    subsets = [
+        (
+            d,
+            X.loc[district_title == d],
+            y_for_training.loc[district_title == d],
+            y_pred_all[(district_title == d).to_numpy()],
+        )
+        for d in districts
+    ]
+    subsets = [s for s in subsets if len(s[1]) >= 10]
+
+    # Districts are scored in parallel; the per-district CV gets the
+    # remaining cores so the nested jobs do not oversubscribe the machine.
+    # Workers only refit, so they get an unfitted copy whose XGBoost step is
+    # single-threaded; otherwise every fold would start one thread per core.
+    n_outer = max(1, min(len(subsets), effective_n_jobs(-1)))
+    inner_jobs = max(1, effective_n_jobs(-1) // n_outer)
+    cv_model = clone(best_model).set_params(model__n_jobs=1)
+    district_results = Parallel(n_jobs=n_outer)(
+        delayed(_district_metrics)(
+            Xd, yd, y_pred_d, cv_model, use_log1p, cv_r2_global, cv_r2_std_global, inner_jobs
+        )
+        for _, Xd, yd, y_pred_d in subsets
+    )
 
+    for (d, *_), entry in zip(subsets, district_results):
+        per_district_meta[d] = entry
         logger.info(
             "  %s: rows=%d, cv_r2=%.3f, test_r2=%.3f, mae=%.2f, conf=%.0f%%",
-            d, len(Xd), cv_r2_d, r2_d, mae_d, confidence_d,
+            d, entry["n_rows"], entry["cv_r2_mean"], entry["test_r2"],
+            entry["mae"], entry["confidence_pct"],
         )
 
+    # Drop the fit cache before persisting so the saved pipeline does not
+    # reference a scratch directory.
+    best_model.set_params(memory=None)
+    pipe_cache_dir.cleanup()
+
     # ── Persist model artifacts ──
     version = _get_version_stamp()
     MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
     # Save the UNIFIED model (single Pipeline, not a dict)
-    joblib.dump(best_model, MODELS_DIR / f"yield_model_{version}.pkl")
-    joblib.dump(best_model, MODELS_DIR / "yield_model.pkl")
+    _dump_artifact(best_model, "yield_model", version)
 
     # Also save as preprocessor for backward compat
-    joblib.dump(best_model.named_steps["preprocessor"], MODELS_DIR / f"preprocessor_{version}.pkl")
-    joblib.dump(best_model.named_steps["preprocessor"], MODELS_DIR / "preprocessor.pkl")
+    _dump_artifact(best_model.named_steps["preprocessor"], "preprocessor", version)
 
     # Also save as yield_models.pkl (dict with single "unified" key) for backward compat
-    joblib.dump({"__unified__": best_model}, MODELS_DIR / f"yield_models_{version}.pkl")
-    joblib.dump({"__unified__": best_model}, MODELS_DIR / "yield_models.pkl")
+    _dump_artifact({"__unified__": best_model}, "yield_models", version)
 
     # Metadata for prediction and advisory
     metadata.update(
@@ -367,6 +468,7 @@ def train_models(district: str = "Mysuru") -> None:
                 "test_r2": float(r2_global),
                 "mae": float(mae_global),
                 "rmse": float(rmse_global),
+                "residual_std": residual_std_global,
                 "best_params": {str(k): str(v) for k, v in search.best_params_.items()},
                 "top_features": top_feats,
             },
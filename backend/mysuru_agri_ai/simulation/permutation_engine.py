@@ -1,11 +1,28 @@
 import logging
-from itertools import product
+import os
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, Iterator, List, Tuple
 
+import numpy as np
 import pandas as pd
 
-from ..pipeline.preprocess import load_crop_management_data
+from ..pipeline.preprocess import (
+    atomic_write,
+    filter_crop_management_data,
+    normalize_missing_strings,
+    read_crop_management_raw,
+)
+
+try:
+    import polars as pl
+except Exception:
+    pl = None
+try:  # Numba is optional; without it blocks are validated with numpy masks
+    from numba import njit  # type: ignore[import]
+except Exception:  # pragma: no cover - defensive
+    njit = None
 
 
 logger = logging.getLogger(__name__)
@@ -13,28 +30,160 @@ logger = logging.getLogger(__name__)
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = PROJECT_ROOT / "data"
 
+SCENARIO_COLUMNS = ["district", "Crops", "Season", "Soil type", "Irrigation", "Area"]
 
-def extract_option_space(
-    data_season_path: Path | None = None,
-    district: str = "Mysuru",
-) -> Dict[str, List]:
+# Validate only crop-season (and district when present) to allow broader
+# what-if simulation across soil/irrigation while still blocking impossible
+# crop-season pairs.
+_KEY_COL_CANDIDATES = ("district", "Crops", "Season")
+
+# Upper bound on rows materialised at once while expanding the product.
+SCENARIO_BLOCK_SIZE = 100_000
+
+# Largest product generate_scenarios will expand without an explicit
+# max_combinations.
+MAX_SCENARIO_COMBINATIONS = 1_000_000
+
+# The polars cross/semi-join is slower than the block expander at the sizes
+# this service handles, so it is only used when explicitly enabled.
+USE_POLARS = os.getenv("MYSURU_AGRI_POLARS_SCENARIOS", "0") == "1"
+
+# Largest folded key space the compiled emitter will index with a dense
+# lookup table; larger key spaces use the numpy path.
+_MAX_KEY_TABLE_SIZE = 1 << 24
+
+
+def _shrink(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Extract dynamic dropdown options from the crop management dataset.
+    Downcast numeric columns to the smallest dtype that holds their values
+    exactly and store repetitive string columns as categoricals.
+    """
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_integer_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series.dtype):
+            # Only keep float32 when it round-trips, so option lists built
+            # from the history show the same values as the CSV.
+            narrowed = series.astype(np.float32)
+            if np.array_equal(narrowed.to_numpy(np.float64), series.to_numpy(), equal_nan=True):
+                df[col] = narrowed
+        elif series.dtype == object and len(df) and series.nunique() / len(df) < 0.5:
+            df[col] = series.astype("category")
+    return df
 
-    Returns a dictionary with unique values for crop, season, soil_type,
-    irrigation, and area.
+
+@lru_cache(maxsize=2)
+def _cached_raw_history(path_str: str, mtime_ns: int) -> pd.DataFrame:
     """
-    if data_season_path is None:
-        data_season_path = DATA_DIR / "data_season.csv"
+    Read the unfiltered crop management CSV, preferring a Parquet copy
+    (``<stem>.parquet``) written next to it on an earlier cold load. The copy
+    is district independent, so there is only ever one per CSV, and it is
+    only used while it is at least as new as the CSV. Any failure to read or
+    write it (e.g. pyarrow missing, read-only data dir) falls back to the CSV.
+    The copy is written with ``atomic_write`` so concurrent workers never see
+    a partial file, and an unreadable copy is removed so the next load
+    rewrites it.
+    """
+    path = Path(path_str)
+    cache_path = path.with_suffix(".parquet")
+    try:
+        if cache_path.exists() and cache_path.stat().st_mtime_ns >= mtime_ns:
+            return normalize_missing_strings(pd.read_parquet(cache_path, engine="pyarrow"))
+    except Exception:
+        logger.debug("Discarding unreadable history cache %s", cache_path, exc_info=True)
+        try:
+            cache_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    df = read_crop_management_raw(path)
+    try:
+        atomic_write(
+            cache_path,
+            lambda tmp_path: df.to_parquet(tmp_path, engine="pyarrow", compression="zstd"),
+        )
+    except Exception:
+        logger.debug("Could not write history cache %s", cache_path, exc_info=True)
+    return df
+
+
+@lru_cache(maxsize=8)
+def _cached_history(path_str: str, mtime_ns: int, district: str) -> pd.DataFrame:
+    """
+    Cleaned, district-filtered history (compacted by ``_shrink``), filtered
+    from the shared raw frame. The frame is shared between callers and must
+    be treated as read-only.
+    """
+    raw = _cached_raw_history(path_str, mtime_ns)
+    # The filter may modify its input, and the raw frame is shared.
+    return _shrink(filter_crop_management_data(raw.copy(), district=district))
+
+
+@dataclass(frozen=True)
+class _HistoryKeys:
+    """Deduplicated crop-season keys of a history frame, pre-encoded for joins."""
 
-    df = load_crop_management_data(data_season_path, district=district)
+    columns: List[str]
+    dtypes: List[pd.CategoricalDtype]
+    codes: np.ndarray
+    frame: pd.DataFrame
+
+
+def _history_keys(history: pd.DataFrame) -> _HistoryKeys:
+    """
+    Encode the history's key columns for the scenario semi-join.
+
+    The key columns are the ``_KEY_COL_CANDIDATES`` present in the history,
+    resolved once per cached history. Each gets a categorical dtype over its
+    observed values and the per-column codes are folded into one int64 key
+    per row; ``codes`` holds the sorted distinct keys of rows with no missing
+    key value.
+    """
+    columns = [c for c in _KEY_COL_CANDIDATES if c in history.columns]
+    dtypes = []
+    folded = np.zeros(len(history), dtype=np.int64)
+    complete = np.ones(len(history), dtype=bool)
+    for col in columns:
+        dtype = pd.CategoricalDtype(pd.unique(history[col].dropna()))
+        col_codes = history[col].astype(dtype).cat.codes.to_numpy()
+        folded = folded * len(dtype.categories) + col_codes
+        complete &= col_codes >= 0
+        dtypes.append(dtype)
+    frame = history.loc[complete, columns].drop_duplicates()
+    return _HistoryKeys(columns, dtypes, np.unique(folded[complete]), frame)
+
+
+@lru_cache(maxsize=8)
+def _cached_history_keys(path_str: str, mtime_ns: int, district: str) -> _HistoryKeys:
+    return _history_keys(_cached_history(path_str, mtime_ns, district))
+
+
+def _load_history_keys(path: Path, district: str) -> _HistoryKeys:
+    """
+    Load the encoded crop-season keys of the history through a small
+    in-process cache.
+
+    The file's modification time is part of the key, so an edited CSV is
+    re-read on the next call. Only the keys are returned: scenario
+    generation never needs the full history frame.
+    """
+    path = Path(path)
+    return _cached_history_keys(str(path), path.stat().st_mtime_ns, district)
+
+
+@lru_cache(maxsize=16)
+def _cached_option_space(
+    path_str: str, mtime_ns: int, nutrient_mtime_ns: int | None, district: str
+) -> Dict[str, List]:
+    df = _cached_history(path_str, mtime_ns, district)
 
     # District options are derived from available CSV sources (not hardcoded):
     # - Mysuru from `data_season.csv` Location/district filtering
     # - Pune from `Nutrient.csv` District column (if present)
     districts = set([district.title()])
     nutrient_path = DATA_DIR / "Nutrient.csv"
-    if nutrient_path.exists():
+    if nutrient_mtime_ns is not None:
         try:
             ndf = pd.read_csv(nutrient_path)
             if "District" in ndf.columns:
@@ -44,60 +193,321 @@ def extract_option_space(
         except Exception:
             pass
 
+    # One dedup pass over the option columns; each option list is then the
+    # sorted distinct values of a (much smaller) column.
+    option_cols = [
+        c for c in ["Crops", "Season", "Soil type", "Irrigation", "Area"] if c in df.columns
+    ]
+    distinct = df[option_cols].drop_duplicates()
+
+    def _sorted_unique(col: str) -> List:
+        if col not in distinct.columns:
+            return []
+        return np.sort(np.asarray(distinct[col].dropna().unique())).tolist()
+
     options = {
         "district": sorted(districts),
-        "crop": sorted(df["Crops"].dropna().unique().tolist()),
-        "season": sorted(df["Season"].dropna().unique().tolist()),
-        "soil_type": (
-            sorted(df["Soil type"].dropna().unique().tolist())
-            if "Soil type" in df.columns
-            else []
-        ),
-        "irrigation": (
-            sorted(df["Irrigation"].dropna().unique().tolist())
-            if "Irrigation" in df.columns
-            else []
-        ),
-        "area": sorted(df["Area"].dropna().unique().tolist())
-        if "Area" in df.columns
-        else [],
+        "crop": _sorted_unique("Crops"),
+        "season": _sorted_unique("Season"),
+        "soil_type": _sorted_unique("Soil type"),
+        "irrigation": _sorted_unique("Irrigation"),
+        "area": _sorted_unique("Area"),
     }
     return options
 
 
-def _validate_combinations_against_history(
-    combos: pd.DataFrame, history: pd.DataFrame
+def extract_option_space(
+    data_season_path: Path | None = None,
+    district: str = "Mysuru",
+    return_history: bool = False,
+) -> Dict[str, List] | Tuple[Dict[str, List], pd.DataFrame]:
+    """
+    Extract dynamic dropdown options from the crop management dataset.
+
+    Returns a dictionary with unique values for crop, season, soil_type,
+    irrigation, and area. With ``return_history=True`` the loaded history is
+    returned alongside it as ``(options, history)`` so it can be handed to
+    ``generate_scenarios`` without parsing it again.
+
+    Options are cached on the modification times of ``data_season.csv`` and
+    ``Nutrient.csv``; each call gets its own copy of the option lists and of
+    the history frame, so callers may modify them freely.
+    """
+    if data_season_path is None:
+        data_season_path = DATA_DIR / "data_season.csv"
+
+    path = Path(data_season_path)
+    mtime_ns = path.stat().st_mtime_ns
+    nutrient_path = DATA_DIR / "Nutrient.csv"
+    nutrient_mtime_ns = nutrient_path.stat().st_mtime_ns if nutrient_path.exists() else None
+
+    cached = _cached_option_space(str(path), mtime_ns, nutrient_mtime_ns, district)
+    options = {key: list(values) for key, values in cached.items()}
+    if return_history:
+        return options, _cached_history(str(path), mtime_ns, district).copy()
+    return options
+
+
+def _title_axis(values: List, strip: bool = False) -> np.ndarray:
+    """Title-case one selection axis with pandas' vectorised string methods."""
+    titled = pd.Series(values, dtype=object).astype(str)
+    if strip:
+        titled = titled.str.strip()
+    return titled.str.title().to_numpy(dtype=object)
+
+
+def _axis_key_codes(
+    axes: List[np.ndarray], hist_keys: _HistoryKeys
+) -> List[Tuple[int, np.ndarray, int]]:
+    """
+    Look up each key axis in the history's categories (many-to-one: the
+    categories are unique).
+
+    Returns ``(axis index, per-value code, number of categories)`` for every
+    key column; values unseen in the history get code -1.
+    """
+    key_codes = []
+    for col, dtype in zip(hist_keys.columns, hist_keys.dtypes):
+        i = SCENARIO_COLUMNS.index(col)
+        codes = pd.Index(dtype.categories).get_indexer(axes[i])
+        key_codes.append((i, codes, len(dtype.categories)))
+    return key_codes
+
+
+def _rows_below_limit(kept: List[np.ndarray], shape: Tuple[int, ...], limit: int) -> int:
+    """
+    Count the rows of the product over ``kept`` whose position in the full
+    product of ``shape`` is below ``limit``, without enumerating them.
+
+    ``kept`` must hold ascending positions. The count is the number of kept
+    tuples that sort lexicographically before the digits of ``limit``.
+    """
+    if limit >= int(np.prod(shape)):
+        return int(np.prod([len(k) for k in kept]))
+    count = 0
+    digits = np.unravel_index(limit, shape)
+    for j, (k, digit) in enumerate(zip(kept, digits)):
+        tail = int(np.prod([len(rest) for rest in kept[j + 1:]]))
+        before = int(np.searchsorted(k, digit))
+        count += before * tail
+        if before == len(k) or k[before] != digit:
+            break
+    return count
+
+
+def _emit_supported_kernel(
+    kept_flat: np.ndarray,
+    kept_offsets: np.ndarray,
+    kept_shape: np.ndarray,
+    axis_codes_flat: np.ndarray,
+    axis_offsets: np.ndarray,
+    n_categories: np.ndarray,
+    valid_table: np.ndarray,
+    start: int,
+    stop: int,
+) -> np.ndarray:
+    """
+    Decode flat indices ``start:stop`` of the pruned product and keep the
+    rows whose folded key is marked in ``valid_table``.
+
+    Ragged per-axis arrays are passed concatenated with offsets; axes with
+    ``n_categories == 0`` are not keys. Returns an ``(n_axes, n_kept)``
+    array of full-axis positions.
+    """
+    n_axes = kept_shape.shape[0]
+    out = np.empty((n_axes, stop - start), dtype=np.int64)
+    # Decode ``start`` once, then advance the per-axis digits like an
+    # odometer instead of dividing on every row.
+    digits = np.empty(n_axes, dtype=np.int64)
+    rem = start
+    for j in range(n_axes - 1, -1, -1):
+        digits[j] = rem % kept_shape[j]
+        rem //= kept_shape[j]
+    count = 0
+    for _ in range(start, stop):
+        folded = 0
+        supported = True
+        for j in range(n_axes):
+            if n_categories[j] > 0:
+                position = kept_flat[kept_offsets[j] + digits[j]]
+                code = axis_codes_flat[axis_offsets[j] + position]
+                if code < 0:
+                    supported = False
+                    break
+                folded = folded * n_categories[j] + code
+        if supported and valid_table[folded]:
+            for j in range(n_axes):
+                out[j, count] = kept_flat[kept_offsets[j] + digits[j]]
+            count += 1
+        for j in range(n_axes - 1, -1, -1):
+            digits[j] += 1
+            if digits[j] < kept_shape[j]:
+                break
+            digits[j] = 0
+    return out[:, :count]
+
+
+if njit is not None:
+    _emit_supported_kernel = njit(nogil=True, cache=True)(_emit_supported_kernel)
+
+
+def _pack_key_lookup(
+    kept: List[np.ndarray],
+    key_codes: List[Tuple[int, np.ndarray, int]],
+    valid_codes: np.ndarray,
+) -> Tuple[np.ndarray, ...] | None:
+    """
+    Flatten the pruned axes and key codes into the arrays
+    ``_emit_supported_kernel`` expects, or return None when the key space is
+    too large for a dense lookup table.
+    """
+    table_size = int(np.prod([n for _, _, n in key_codes]))
+    if table_size > _MAX_KEY_TABLE_SIZE:
+        return None
+    # Key columns follow SCENARIO_COLUMNS order, so folding by ascending
+    # axis index in the kernel matches the order used for valid_codes.
+    n_categories = np.zeros(len(kept), dtype=np.int64)
+    code_parts = [np.empty(0, dtype=np.int64) for _ in kept]
+    for i, axis_codes, n in key_codes:
+        n_categories[i] = n
+        code_parts[i] = axis_codes.astype(np.int64)
+    valid_table = np.zeros(max(table_size, 1), dtype=np.bool_)
+    valid_table[valid_codes] = True
+    return (
+        np.concatenate(kept).astype(np.int64),
+        np.cumsum([0] + [len(k) for k in kept], dtype=np.int64),
+        np.array([len(k) for k in kept], dtype=np.int64),
+        np.concatenate(code_parts),
+        np.cumsum([0] + [len(p) for p in code_parts], dtype=np.int64),
+        n_categories,
+        valid_table,
+    )
+
+
+def _iter_product_blocks(
+    axes: List[np.ndarray],
+    kept: List[np.ndarray],
+    limit: int,
+    key_codes: List[Tuple[int, np.ndarray, int]] | None = None,
+    valid_codes: np.ndarray | None = None,
+    block_size: int = SCENARIO_BLOCK_SIZE,
+) -> Iterator[List[np.ndarray]]:
+    """
+    Expand the Cartesian product over the ``kept`` positions of each axis in
+    blocks of at most ``block_size`` rows, yielding per-axis position arrays.
+
+    Positions increase along the product, so capping at ``limit``
+    (``max_combinations``) just shortens the decoded range. When
+    ``key_codes`` is given, only rows whose folded key code is in
+    ``valid_codes`` are emitted; with Numba the decode and membership test
+    run in one compiled pass per block.
+    """
+    kept_shape = tuple(len(k) for k in kept)
+    n_rows = _rows_below_limit(kept, tuple(len(axis) for axis in axes), limit)
+    packed = None
+    if key_codes is not None and njit is not None:
+        packed = _pack_key_lookup(kept, key_codes, valid_codes)
+    for start in range(0, n_rows, block_size):
+        if packed is not None:
+            stop = min(start + block_size, n_rows)
+            yield list(_emit_supported_kernel(*packed, start, stop))
+            continue
+        # Decoding a flat range in C order matches itertools.product order.
+        flat = np.arange(start, min(start + block_size, n_rows))
+        codes = [k[i] for k, i in zip(kept, np.unravel_index(flat, kept_shape))]
+        if key_codes is None:
+            yield codes
+        else:
+            folded = np.zeros(len(flat), dtype=np.int64)
+            supported = np.ones(len(flat), dtype=bool)
+            for i, axis_codes, n_categories in key_codes:
+                row_codes = axis_codes[codes[i]]
+                folded = folded * n_categories + row_codes
+                supported &= row_codes >= 0
+            emit = supported & np.isin(folded, valid_codes)
+            yield [code[emit] for code in codes]
+
+
+def _scenario_frame(axes: List[np.ndarray], blocks: Iterable[List[np.ndarray]]) -> pd.DataFrame:
+    """
+    Materialise scenario rows from per-axis position arrays in one step.
+
+    Rows are indexed by their position in the product of the full axes, so
+    pruned products keep the same row order and labels as the full one.
+    """
+    codes = [np.concatenate(parts) for parts in zip(*blocks)]
+    if not codes:
+        codes = [np.empty(0, dtype=np.intp) for _ in axes]
+    return pd.DataFrame(
+        {col: axis[code] for col, axis, code in zip(SCENARIO_COLUMNS, axes, codes)},
+        index=np.ravel_multi_index(codes, tuple(len(axis) for axis in axes)),
+    )
+
+
+def _polars_validated_frame(
+    axes: List[np.ndarray],
+    kept: List[np.ndarray],
+    limit: int,
+    hist_keys: _HistoryKeys,
 ) -> pd.DataFrame:
     """
-    Keep only those crop–season–soil–irrigation combos that have support in
-    the historical data, to avoid unrealistic pairs.
-    """
-    # Validate only crop-season (and district when present) to allow broader
-    # what-if simulation across soil/irrigation while still blocking impossible
-    # crop-season pairs.
-    key_cols = [c for c in ["district", "Crops", "Season"] if c in history.columns]
-    hist_keys = (
-        history[key_cols]
-        .drop_duplicates()
-        .assign(_valid=1)
+    Polars variant of ``_iter_product_blocks`` followed by the history semi-join.
+
+    Only axis positions (plus the key values) travel through the cross and
+    semi joins; the output columns are gathered from ``axes`` afterwards, so
+    dtypes and index labels match the pandas path exactly.
+    """
+    shape = tuple(len(axis) for axis in axes)
+    strides = np.cumprod((shape[1:] + (1,))[::-1])[::-1]
+
+    key_cols = hist_keys.columns
+    plan = None
+    for i, positions in enumerate(kept):
+        part = {f"_pos{i}": pl.Series(positions, dtype=pl.Int64)}
+        if SCENARIO_COLUMNS[i] in key_cols:
+            part[SCENARIO_COLUMNS[i]] = pl.Series(axes[i][positions].tolist(), dtype=pl.String)
+        part = pl.LazyFrame(part)
+        plan = part if plan is None else plan.join(part, how="cross")
+
+    hist_frame = pl.LazyFrame(
+        {
+            c: pl.Series(hist_keys.frame[c].astype(str).tolist(), dtype=pl.String)
+            for c in key_cols
+        }
     )
-    merged = combos.merge(hist_keys, on=key_cols, how="left")
-    valid = merged[merged["_valid"] == 1].drop(columns=["_valid"])
-    return valid
+    position = sum(pl.col(f"_pos{i}") * int(stride) for i, stride in enumerate(strides))
+    codes = (
+        plan.with_columns(_position=position)
+        .filter(pl.col("_position") < limit)
+        .join(hist_frame, on=key_cols, how="semi")
+        .sort("_position")
+        .collect()
+    )
+    return _scenario_frame(axes, [[codes[f"_pos{i}"].to_numpy() for i in range(len(axes))]])
 
 
 def generate_scenarios(
     selected: Dict[str, Iterable],
     max_combinations: int | None = None,
     district: str = "Mysuru",
+    history: pd.DataFrame | None = None,
 ) -> pd.DataFrame:
     """
     Generate a structured list of farming scenarios by taking the Cartesian
     product of user-selected options, and validate them against historical
     crop-season patterns.
+
+    ``history`` may be passed when the caller already holds the crop
+    management data for ``district`` (e.g. from
+    ``extract_option_space(return_history=True)``); otherwise it is loaded.
     """
-    data_season_path = DATA_DIR / "data_season.csv"
-    history = load_crop_management_data(data_season_path, district=district)
+    # Only the small encoded key set is kept alive while the product is
+    # expanded; a caller-supplied frame is not referenced past this point.
+    if history is None:
+        hist_keys = _load_history_keys(DATA_DIR / "data_season.csv", district)
+    else:
+        hist_keys = _history_keys(history)
+        del history
 
     districts = list(selected.get("district", [])) or [district]
     crops = list(selected.get("crop", []))
@@ -109,43 +519,66 @@ def generate_scenarios(
     if not (districts and crops and seasons and soils and irrigations and areas):
         raise ValueError("district, crop, season, soil_type, irrigation, and area must be provided.")
 
-    combo_iter = product(districts, crops, seasons, soils, irrigations, areas)
-    rows = []
-    for idx, (d, c, s, soil, irr, area) in enumerate(combo_iter):
-        if max_combinations is not None and idx >= max_combinations:
-            logger.warning(
-                "Reached max_combinations=%d; truncating scenario generation.",
-                max_combinations,
-            )
-            break
-        rows.append(
-            {
-                "district": str(d).strip().title(),
-                "Crops": str(c).title(),
-                "Season": str(s).title(),
-                "Soil type": str(soil).title(),
-                "Irrigation": str(irr).title(),
-                "Area": area,
-            }
+    total = len(districts) * len(crops) * len(seasons) * len(soils) * len(irrigations) * len(areas)
+    if max_combinations is None and total > MAX_SCENARIO_COMBINATIONS:
+        raise ValueError(
+            f"Refusing to build {total} scenario combinations (limit "
+            f"{MAX_SCENARIO_COMBINATIONS}); narrow the selection or set max_combinations."
         )
 
-    scenarios = pd.DataFrame(rows)
+    # Title-case each axis once; the product itself is expanded as position
+    # arrays in the same row order as itertools.product.
+    axes = [
+        _title_axis(districts, strip=True),
+        _title_axis(crops),
+        _title_axis(seasons),
+        _title_axis(soils),
+        _title_axis(irrigations),
+        pd.Series(areas).to_numpy(),
+    ]
+    limit = total
+    if max_combinations is not None and total > max_combinations:
+        logger.warning(
+            "Reached max_combinations=%d; truncating scenario generation.",
+            max_combinations,
+        )
+        limit = max_combinations
 
-    # Validate against historical crop–season patterns to prefer well-supported
-    # combinations where possible.
-    validated = _validate_combinations_against_history(scenarios, history)
+    # Narrow each key axis to values seen in the history, so the product only
+    # covers selections that can survive the crop-season check.
+    key_codes = _axis_key_codes(axes, hist_keys)
+    kept = [np.arange(len(axis)) for axis in axes]
+    for i, axis_codes, _ in key_codes:
+        kept[i] = np.flatnonzero(axis_codes >= 0)
+
+    # The opt-in polars plan cross-joins the whole pruned product before it
+    # can filter on position, so capped requests always go through the block
+    # expander, which decodes only the rows below the cap.
+    if USE_POLARS and pl is not None and limit == total:
+        validated = _polars_validated_frame(axes, kept, limit, hist_keys)
+    else:
+        # Blocks are semi-joined on integer key codes as they are expanded,
+        # so only one block of unvalidated positions is resident at a time.
+        validated = _scenario_frame(
+            axes, _iter_product_blocks(axes, kept, limit, key_codes, hist_keys.codes)
+        )
 
     if validated.empty:
+        scenarios = _scenario_frame(
+            axes, _iter_product_blocks(axes, [np.arange(len(axis)) for axis in axes], limit)
+        )
         # Fall back to using all generated permutations, but clearly mark that
         # historical coverage is limited so downstream components can adjust
         # confidence and messaging instead of failing the request.
         logger.warning(
             "Limited historical coverage used for district=%s, crops=%s",
             district,
-            ", ".join(sorted({str(r['Crops']) for r in rows})) if rows else "",
+            ", ".join(sorted(set(scenarios["Crops"]))),
         )
         scenarios["coverage_flag"] = "limited"
     else:
+        # validated is a fresh frame, so the flag is set in place rather
+        # than through assign(), which would copy every column.
         scenarios = validated
         scenarios["coverage_flag"] = "full"
 
@@ -35,7 +35,9 @@ def load_model_and_metadata(backend_dir: Path):
             f"Run train_model.py first to generate it."
         )
 
-    model = joblib.load(model_path)
+    # The model is saved uncompressed, so its arrays can be memory-mapped
+    # read-only instead of copied into this process.
+    model = joblib.load(model_path, mmap_mode="r")
 
     metrics: Dict[str, Any] = {}
     if metrics_path.exists():
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the backend packages (mysuru_agri_ai, train_model) by name.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
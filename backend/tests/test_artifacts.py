@@ -0,0 +1,49 @@
+import os
+import stat
+
+import joblib
+import pytest
+
+from mysuru_agri_ai.pipeline.preprocess import atomic_write
+
+
+def _umask_mode() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return 0o666 & ~mask
+
+
+def test_atomic_write_uses_umask_mode(tmp_path):
+    path = tmp_path / "artifact.pkl"
+    atomic_write(path, lambda tmp: joblib.dump({"a": 1}, tmp))
+
+    assert joblib.load(path) == {"a": 1}
+    assert stat.S_IMODE(path.stat().st_mode) == _umask_mode()
+    assert [p.name for p in tmp_path.iterdir()] == ["artifact.pkl"]
+
+
+def test_atomic_write_keeps_old_file_on_failure(tmp_path):
+    path = tmp_path / "artifact.pkl"
+    joblib.dump("old", path)
+
+    def fail(tmp):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(path, fail)
+    assert joblib.load(path) == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["artifact.pkl"]
+
+
+def test_dump_artifact_mode(tmp_path, monkeypatch):
+    pytest.importorskip("matplotlib")
+    pytest.importorskip("xgboost")
+    from mysuru_agri_ai.pipeline import train
+
+    monkeypatch.setattr(train, "MODELS_DIR", tmp_path)
+    train._dump_artifact({"a": 1}, "yield_model", "v1")
+
+    for name in ("yield_model.pkl", "yield_model_v1.pkl"):
+        path = tmp_path / name
+        assert joblib.load(path) == {"a": 1}
+        assert stat.S_IMODE(path.stat().st_mode) == _umask_mode()
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+from mysuru_agri_ai.simulation import permutation_engine
+
+
+def test_unreadable_history_cache_is_replaced(tmp_path):
+    pytest.importorskip("pyarrow")
+    csv_path = tmp_path / "data_season.csv"
+    pd.DataFrame({"Crops": ["Rice", "Ragi"], "Area": [1.0, 2.0]}).to_csv(csv_path, index=False)
+    mtime_ns = csv_path.stat().st_mtime_ns
+    cache_path = csv_path.with_suffix(".parquet")
+
+    permutation_engine._cached_raw_history.cache_clear()
+    expected = permutation_engine._cached_raw_history(str(csv_path), mtime_ns)
+    good = cache_path.read_bytes()
+    cache_path.write_bytes(good[: len(good) // 2])
+
+    permutation_engine._cached_raw_history.cache_clear()
+    try:
+        df = permutation_engine._cached_raw_history(str(csv_path), mtime_ns)
+    finally:
+        permutation_engine._cached_raw_history.cache_clear()
+
+    pd.testing.assert_frame_equal(df, expected)
+    pd.testing.assert_frame_equal(pd.read_parquet(cache_path), expected)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data_season.csv", "data_season.parquet"]
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from mysuru_agri_ai.pipeline.predict import ModelBundle, batch_predict
+
+
+def _unified_bundle() -> ModelBundle:
+    # Ragi yields are noisy and Rice yields are not, so per-tree spread (and
+    # with it interval width) differs between the two crops.
+    rng = np.random.default_rng(0)
+    n = 400
+    train = pd.DataFrame(
+        {
+            "Crops": rng.choice(["Rice", "Ragi"], n),
+            "Season": rng.choice(["Kharif", "Rabi"], n),
+            "Area": rng.uniform(1.0, 5.0, n),
+        }
+    )
+    noisy = (train["Crops"] == "Ragi").to_numpy()
+    y = np.where(noisy, 1.0 + rng.normal(0.0, 0.8, n), 4.0 + rng.normal(0.0, 0.05, n))
+
+    preprocessor = ColumnTransformer(
+        [
+            ("num", "passthrough", ["Area"]),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["Crops", "Season"]),
+        ]
+    )
+    model = RandomForestRegressor(n_estimators=30, min_samples_leaf=5, random_state=0)
+    pipeline = Pipeline([("preprocessor", preprocessor), ("model", model)]).fit(train, y)
+    metadata = {
+        "model_type": "unified",
+        "feature_spec": {"numeric": ["Area"], "categorical": ["Crops", "Season"]},
+        "global_metrics": {"confidence_pct": 70.0, "residual_std": 0.4},
+        "per_district": {"Mysuru": {"confidence_pct": 70.0, "residual_std": 0.4}},
+    }
+    return ModelBundle(model=pipeline, preprocessor=None, metadata=metadata)
+
+
+def _scenarios() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "district": "Mysuru",
+            "Crops": ["Rice", "Rice", "Ragi", "Ragi"],
+            "Season": ["Kharif", "Rabi", "Kharif", "Rabi"],
+            "Soil type": "Red",
+            "Irrigation": "Drip",
+            "Area": [2.0, 3.0, 2.0, 3.0],
+        }
+    )
+
+
+def test_per_tree_intervals_vary_risk_and_confidence():
+    results = batch_predict(_unified_bundle(), _scenarios())
+
+    assert results["confidence"].nunique() > 1
+    assert results["risk_level"].nunique() > 1
+
+
+def test_simulate_uses_per_tree_intervals_unless_requested(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from mysuru_agri_ai.app import main
+
+    seen = []
+
+    def fake_batch_predict(bundle, scenarios, fast_ci=False):
+        seen.append(fast_ci)
+        return batch_predict(bundle, scenarios, fast_ci=fast_ci)
+
+    monkeypatch.setattr(main, "batch_predict", fake_batch_predict)
+    monkeypatch.setattr(main, "generate_scenarios", lambda selected, **_: _scenarios())
+    main.app.dependency_overrides[main._get_model_bundle] = _unified_bundle
+    try:
+        client = TestClient(main.app)
+        payload = {
+            "crop": ["Rice", "Ragi"],
+            "season": ["Kharif", "Rabi"],
+            "soil_type": ["Red"],
+            "irrigation": ["Drip"],
+            "area": [2.0, 3.0],
+        }
+        assert client.post("/simulate", json=payload).status_code == 200
+        assert client.post("/simulate", json=dict(payload, fast_ci=True)).status_code == 200
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert seen == [False, True]
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+import train_model
+
+
+def _feature_frame(n: int = 200) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "district": rng.choice(["mysuru", "mandya"], n),
+            "crop": rng.choice(["rice", "ragi", "maize"], n),
+            "season": rng.choice(["kharif", "rabi"], n),
+            "area_hectares": rng.uniform(0.5, 5.0, n),
+            "rainfall": rng.uniform(400.0, 1200.0, n),
+            "temperature": rng.uniform(18.0, 34.0, n),
+            "yield": rng.uniform(1.0, 4.0, n),
+        }
+    )
+
+
+def test_pipeline_casts_numeric_features_to_float32():
+    df = _feature_frame()
+    pipeline, _ = train_model.build_pipeline(df, "yield")
+
+    numeric = ["area_hectares", "rainfall", "temperature"]
+    num_pipe = pipeline.named_steps["preprocess"].named_transformers_["num"]
+    assert num_pipe.transform(df[numeric]).dtype == np.float32
+
+    X = df.drop(columns="yield")
+    X32 = X.astype({c: np.float32 for c in numeric})
+    np.testing.assert_array_equal(pipeline.predict(X), pipeline.predict(X32))
+
+
+def test_pipeline_keeps_feature_names():
+    pipeline, _ = train_model.build_pipeline(_feature_frame(), "yield")
+
+    names = list(pipeline.named_steps["preprocess"].get_feature_names_out())
+    assert names[:3] == ["num__area_hectares", "num__rainfall", "num__temperature"]
+    assert "cat__crop_rice" in names
+
+
+def test_crop_yield_workbook_cache_is_replaced_when_unreadable(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_read_excel(path, engine=None):
+        calls.append(path)
+        return pd.DataFrame({"crop": ["rice", "ragi"], "yield": [2.0, 1.5]})
+
+    monkeypatch.setattr(pd, "read_excel", fake_read_excel)
+    workbook = tmp_path / "crops.xlsx"
+    workbook.write_bytes(b"")
+    cache_path = workbook.with_suffix(".parquet")
+
+    expected = train_model._read_crop_yield_workbook(workbook)
+    good = cache_path.read_bytes()
+    cache_path.write_bytes(good[: len(good) // 2])
+
+    df = train_model._read_crop_yield_workbook(workbook)
+
+    pd.testing.assert_frame_equal(df, expected)
+    pd.testing.assert_frame_equal(pd.read_parquet(cache_path), expected)
+    assert len(calls) == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["crops.parquet", "crops.xlsx"]
+
+
+def test_karnataka_district_mask_handles_non_string_districts():
+    mixed = pd.Series(["Mysuru", 12, "MANDYA", np.nan, 3.5, "Pune"])
+    np.testing.assert_array_equal(
+        train_model._karnataka_district_mask(mixed),
+        [True, False, True, False, False, False],
+    )
+
+    numeric = pd.Series([1, 2, 2])
+    assert not train_model._karnataka_district_mask(numeric).any()
+
+    assert not train_model._karnataka_district_mask(pd.Series([np.nan, np.nan])).any()
@@ -1,7 +1,7 @@
 import json
 import os
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -9,51 +9,54 @@ from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import ShuffleSplit
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
 import joblib
 
-
-KARNATAKA_DISTRICTS: List[str] = [
-    "bagalkot",
-    "ballari",
-    "belagavi",
-    "bengaluru rural",
-    "bengaluru urban",
-    "bidar",
-    "chamarajanagar",
-    "chikkaballapur",
-    "chikkamagaluru",
-    "chitradurga",
-    "dakshina kannada",
-    "davangere",
-    "dharwad",
-    "gadag",
-    "hassan",
-    "haveri",
-    "kalaburagi",
-    "kodagu",
-    "kolar",
-    "koppal",
-    "mandya",
-    "mysuru",
-    "raichur",
-    "ramanagara",
-    "shivamogga",
-    "tumakuru",
-    "udupi",
-    "uttara kannada",
-    "vijayapura",
-    "yadgir",
-]
+from mysuru_agri_ai.pipeline.preprocess import atomic_write
+
+
+KARNATAKA_DISTRICTS: FrozenSet[str] = frozenset(
+    {
+        "bagalkot",
+        "ballari",
+        "belagavi",
+        "bengaluru rural",
+        "bengaluru urban",
+        "bidar",
+        "chamarajanagar",
+        "chikkaballapur",
+        "chikkamagaluru",
+        "chitradurga",
+        "dakshina kannada",
+        "davangere",
+        "dharwad",
+        "gadag",
+        "hassan",
+        "haveri",
+        "kalaburagi",
+        "kodagu",
+        "kolar",
+        "koppal",
+        "mandya",
+        "mysuru",
+        "raichur",
+        "ramanagara",
+        "shivamogga",
+        "tumakuru",
+        "udupi",
+        "uttara kannada",
+        "vijayapura",
+        "yadgir",
+    }
+)
 
 
 def _normalise_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Lower-case and strip column names for easier matching."""
-    df = df.copy()
-    df.columns = [c.strip().lower() for c in df.columns]
-    return df
+    # Only the column axis is rewritten; the data blocks are shared.
+    return df.rename(columns=lambda c: c.strip().lower(), copy=False)
 
 
 def _find_column(columns: List[str], *keywords: str) -> str:
@@ -65,6 +68,116 @@ def _find_column(columns: List[str], *keywords: str) -> str:
     raise ValueError(f"Could not find column matching keywords {keywords} in {columns}")
 
 
+def _resolve_columns(
+    columns: List[str], wanted: Dict[str, Tuple[str, ...]]
+) -> Dict[str, Optional[str]]:
+    """
+    Resolve several `_find_column` lookups in a single pass over `columns`.
+
+    `wanted` maps a lookup name to its keywords; each name resolves to the
+    first column containing all of them, or None when nothing matches.
+    """
+    found: Dict[str, Optional[str]] = dict.fromkeys(wanted)
+    pending = {key: tuple(k.lower() for k in kws) for key, kws in wanted.items()}
+    for col in columns:
+        name = col.lower()
+        for key, kws in list(pending.items()):
+            if all(k in name for k in kws):
+                found[key] = col
+                del pending[key]
+        if not pending:
+            break
+    return found
+
+
+def _require_column(
+    found: Dict[str, Optional[str]],
+    wanted: Dict[str, Tuple[str, ...]],
+    columns: List[str],
+    *keys: str,
+) -> str:
+    """Return the first resolved column among `keys`, or raise like `_find_column`."""
+    for key in keys:
+        if found[key] is not None:
+            return found[key]
+    raise ValueError(
+        f"Could not find column matching keywords {wanted[keys[-1]]} in {columns}"
+    )
+
+
+def _group_metrics_from_sums(agg: pd.DataFrame) -> Dict[Any, Dict[str, float]]:
+    """
+    Turn per-group residual sums (sq, abs, y_true, y_true_sq, n) into
+    rmse/mae/r2 dicts, skipping groups too small for stable metrics.
+    """
+    agg = agg[agg["n"] >= 5]
+    n = agg["n"].to_numpy(dtype=float)
+    ss_res = agg["sq"].to_numpy(dtype=float)
+    ss_tot = agg["y_true_sq"].to_numpy(dtype=float) - agg["y_true"].to_numpy(dtype=float) ** 2 / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Mirror sklearn's r2_score for constant targets (1.0 if perfect else 0.0).
+        r2 = np.where(ss_tot > 0, 1.0 - ss_res / ss_tot, np.where(ss_res == 0, 1.0, 0.0))
+    rmse = np.sqrt(ss_res / n)
+    mae = agg["abs"].to_numpy(dtype=float) / n
+
+    return {
+        key: {
+            "rmse": float(rmse[i]),
+            "mae": float(mae[i]),
+            "r2": float(r2[i]),
+            "n": int(n[i]),
+        }
+        for i, key in enumerate(agg.index)
+    }
+
+
+def _read_crop_yield_workbook(path: Path) -> pd.DataFrame:
+    """
+    Read the crop yield workbook, preferring a Parquet copy next to it.
+
+    Parsing XLSX is far slower than reading a columnar file, and the workbook
+    rarely changes, so the first read writes `<name>.parquet` and later reads
+    use it for as long as it is newer than the workbook. The copy is written
+    atomically so an interrupted run cannot leave a truncated file behind.
+    """
+    cache_path = path.with_suffix(".parquet")
+    if cache_path.exists() and cache_path.stat().st_mtime >= path.stat().st_mtime:
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception:
+            # Unreadable cache or no parquet engine; drop it and re-parse.
+            try:
+                cache_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    try:
+        # Rust-backed reader, much faster than openpyxl when installed.
+        df = pd.read_excel(path, engine="calamine")
+    except ImportError:
+        df = pd.read_excel(path)
+
+    try:
+        atomic_write(cache_path, lambda tmp_path: df.to_parquet(tmp_path, index=False))
+    except Exception:
+        pass  # caching is best-effort (e.g. pyarrow not installed)
+    return df
+
+
+def _karnataka_district_mask(districts: pd.Series) -> np.ndarray:
+    """
+    Boolean row mask of districts named in KARNATAKA_DISTRICTS, ignoring case.
+
+    The unique names are lower-cased and tested once, then mapped back to
+    rows through the category codes. Names that are not strings (e.g. numeric
+    cells in the workbook) are compared by their string form.
+    """
+    districts = districts.astype("category")
+    known = districts.cat.categories.astype(str).str.lower().isin(KARNATAKA_DISTRICTS)
+    # Missing values have code -1, which picks the trailing False.
+    return np.append(known, False)[districts.cat.codes.to_numpy()]
+
+
 def load_and_merge_datasets(project_root: Path) -> Tuple[pd.DataFrame, str]:
     """
     Load weather, crop recommendation and crop yield datasets,
@@ -91,74 +204,79 @@ def load_and_merge_datasets(project_root: Path) -> Tuple[pd.DataFrame, str]:
     # --- Load raw datasets ---
     weather_df = pd.read_csv(weather_path)
     crop_rec_df = pd.read_csv(crop_rec_path)
-    crop_yield_df = pd.read_excel(crop_yield_path)
+    crop_yield_df = _read_crop_yield_workbook(crop_yield_path)
 
     weather_df = _normalise_columns(weather_df)
     crop_rec_df = _normalise_columns(crop_rec_df)
     crop_yield_df = _normalise_columns(crop_yield_df)
 
     # --- Standardise key column names using heuristics ---
+    # Each frame's lookups are resolved together in one pass over its columns.
     # Weather
-    weather_district_col = _find_column(weather_df.columns.tolist(), "district") if any(
-        "district" in c for c in weather_df.columns
-    ) else _find_column(weather_df.columns.tolist(), "location")
-    rainfall_col = _find_column(weather_df.columns.tolist(), "rain")
-    temp_col = _find_column(weather_df.columns.tolist(), "temp")
-    humidity_col = _find_column(weather_df.columns.tolist(), "humid")
+    weather_columns = weather_df.columns.tolist()
+    weather_wanted = {
+        "district": ("district",),
+        "location": ("location",),
+        "rainfall": ("rain",),
+        "temperature": ("temp",),
+        "humidity": ("humid",),
+    }
+    weather_found = _resolve_columns(weather_columns, weather_wanted)
+    weather_district_col = _require_column(
+        weather_found, weather_wanted, weather_columns, "district", "location"
+    )
 
     weather_df = weather_df.rename(
         columns={
             weather_district_col: "district",
-            rainfall_col: "rainfall",
-            temp_col: "temperature",
-            humidity_col: "humidity",
+            **{
+                _require_column(weather_found, weather_wanted, weather_columns, key): key
+                for key in ("rainfall", "temperature", "humidity")
+            },
         }
     )
 
     # Crop recommendation – typically N, P, K, ph, rainfall, label (crop)
-    n_col = _find_column(crop_rec_df.columns.tolist(), "n")
-    p_col = _find_column(crop_rec_df.columns.tolist(), "p")
-    k_col = _find_column(crop_rec_df.columns.tolist(), "k")
-    ph_col = _find_column(crop_rec_df.columns.tolist(), "ph")
-    rec_rainfall_col = _find_column(crop_rec_df.columns.tolist(), "rain")
-    crop_label_col = _find_column(crop_rec_df.columns.tolist(), "label")
+    rec_columns = crop_rec_df.columns.tolist()
+    rec_wanted = {
+        "n": ("n",),
+        "p": ("p",),
+        "k": ("k",),
+        "ph": ("ph",),
+        "rec_rainfall": ("rain",),
+        "crop": ("label",),
+    }
+    rec_found = _resolve_columns(rec_columns, rec_wanted)
 
     crop_rec_df = crop_rec_df.rename(
         columns={
-            n_col: "n",
-            p_col: "p",
-            k_col: "k",
-            ph_col: "ph",
-            rec_rainfall_col: "rec_rainfall",
-            crop_label_col: "crop",
+            _require_column(rec_found, rec_wanted, rec_columns, key): key
+            for key in rec_wanted
         }
     )
 
     # Crop yield dataset – crop, district, season, irrigation, area, yield
     y_columns = crop_yield_df.columns.tolist()
+    y_wanted = {
+        "district": ("district",),
+        "crop": ("crop",),
+        # Season and irrigation might be named in various ways
+        "season": ("season",),
+        "irrigation": ("irrigation",),
+        # Cultivated area
+        "area": ("area",),
+        "cultivated": ("cultivated",),
+        # Target yield
+        "yield": ("yield",),
+    }
+    y_found = _resolve_columns(y_columns, y_wanted)
 
-    district_col = _find_column(y_columns, "district")
-    crop_col = _find_column(y_columns, "crop")
-
-    # Season and irrigation might be named in various ways
-    try:
-        season_col = _find_column(y_columns, "season")
-    except ValueError:
-        season_col = None
-
-    try:
-        irrigation_col = _find_column(y_columns, "irrigation")
-    except ValueError:
-        irrigation_col = None
-
-    # Cultivated area
-    try:
-        area_col = _find_column(y_columns, "area")
-    except ValueError:
-        area_col = _find_column(y_columns, "cultivated")
-
-    # Target yield
-    target_col = _find_column(y_columns, "yield")
+    district_col = _require_column(y_found, y_wanted, y_columns, "district")
+    crop_col = _require_column(y_found, y_wanted, y_columns, "crop")
+    season_col = y_found["season"]
+    irrigation_col = y_found["irrigation"]
+    area_col = _require_column(y_found, y_wanted, y_columns, "area", "cultivated")
+    target_col = _require_column(y_found, y_wanted, y_columns, "yield")
 
     rename_map = {
         district_col: "district",
@@ -173,14 +291,24 @@ def load_and_merge_datasets(project_root: Path) -> Tuple[pd.DataFrame, str]:
 
     crop_yield_df = crop_yield_df.rename(columns=rename_map)
 
+    # These low-cardinality string columns are filtered, merged and grouped
+    # repeatedly below; as categoricals those steps work on integer codes.
+    # Values are kept as-is (not lower-cased) so they still match the raw
+    # strings passed in at prediction time.
+    crop_yield_df = crop_yield_df.astype(
+        {
+            c: "category"
+            for c in ("district", "crop", "season", "irrigation_type")
+            if c in crop_yield_df.columns
+        }
+    )
+
     # Filter to Karnataka if state is available, otherwise filter by district list
     if any("state" in c for c in crop_yield_df.columns):
         state_col = _find_column(crop_yield_df.columns.tolist(), "state")
         crop_yield_df = crop_yield_df[crop_yield_df[state_col].str.lower() == "karnataka"]
     else:
-        crop_yield_df = crop_yield_df[
-            crop_yield_df["district"].str.lower().isin(KARNATAKA_DISTRICTS)
-        ]
+        crop_yield_df = crop_yield_df[_karnataka_district_mask(crop_yield_df["district"])]
 
     # --- Merge datasets ---
     merged = crop_yield_df.merge(
@@ -232,7 +360,8 @@ def build_pipeline(feature_df: pd.DataFrame, target_col: str) -> Tuple[Pipeline,
     if not available_features:
         raise ValueError("No usable feature columns found in merged dataset.")
 
-    df = feature_df.copy()
+    # The frame is only read from below, so no defensive copy is needed.
+    df = feature_df
 
     X = df[available_features]
     y = df[target_col].astype(float)
@@ -243,8 +372,23 @@ def build_pipeline(feature_df: pd.DataFrame, target_col: str) -> Tuple[Pipeline,
     ]
     categorical_features = [c for c in available_features if c not in numeric_features]
 
+    # Category dtype stores each string column as small integer codes, so the
+    # imputer/encoder work on a far smaller frame than object columns.
+    X = X.astype({c: "category" for c in categorical_features})
+    # float32 halves the bytes moved through imputation and binning; the
+    # histogram model buckets features into at most 255 bins anyway. The cast
+    # is a pipeline step so inference sees exactly the values the bin
+    # thresholds were learned on.
     numeric_transformer = Pipeline(
         steps=[
+            (
+                "to_float32",
+                FunctionTransformer(
+                    np.asarray,
+                    kw_args={"dtype": np.float32},
+                    feature_names_out="one-to-one",
+                ),
+            ),
             ("imputer", SimpleImputer(strategy="median")),
         ]
     )
@@ -281,31 +425,27 @@ def build_pipeline(feature_df: pd.DataFrame, target_col: str) -> Tuple[Pipeline,
 
     # --- Time-aware or grouped split ---
     # If a year column exists, train on past years and evaluate on the latest year.
+    # Both branches resolve to integer row positions so the frames are sliced
+    # once with `take` rather than by boolean masks.
+    train_pos = test_pos = None
     if "year" in df.columns and df["year"].notna().any():
         years = sorted(df["year"].dropna().unique().tolist())
         if len(years) >= 2:
             test_year = years[-1]
-            train_mask = df["year"] < test_year
-            test_mask = df["year"] == test_year
-
-            if train_mask.sum() > 0 and test_mask.sum() > 0:
-                X_train, X_test = X[train_mask], X[test_mask]
-                y_train, y_test = y[train_mask], y[test_mask]
-            else:
-                # Fallback if year split is degenerate
-                X_train, X_test, y_train, y_test = train_test_split(
-                    X, y, test_size=0.2, random_state=42
-                )
-        else:
-            # Not enough distinct years, use standard random split
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
-            )
-    else:
-        # No explicit year information; use a standard stratified-by-distribution split.
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+            train_pos = np.flatnonzero((df["year"] < test_year).to_numpy())
+            test_pos = np.flatnonzero((df["year"] == test_year).to_numpy())
+
+            if not (len(train_pos) and len(test_pos)):
+                # Year split is degenerate; fall back to a random split.
+                train_pos = test_pos = None
+
+    if train_pos is None:
+        # Not enough distinct years (or none at all); use a standard random split.
+        splitter = ShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+        train_pos, test_pos = next(splitter.split(X))
+
+    X_train, X_test = X.take(train_pos), X.take(test_pos)
+    y_train, y_test = y.take(train_pos), y.take(test_pos)
 
     pipeline.fit(X_train, y_train)
 
@@ -337,49 +477,50 @@ def build_pipeline(feature_df: pd.DataFrame, target_col: str) -> Tuple[Pipeline,
     eval_df["y_pred"] = y_pred
 
     per_crop: Dict[str, Dict[str, float]] = {}
+    per_crop_district: Dict[str, Dict[str, float]] = {}
     if "crop" in eval_df.columns:
-        for crop_name, group in eval_df.groupby("crop"):
-            if len(group) < 5:
-                continue  # avoid unstable metrics
-            per_crop[crop_name] = {
-                "rmse": float(
-                    np.sqrt(mean_squared_error(group["y_true"], group["y_pred"]))
-                ),
-                "mae": float(mean_absolute_error(group["y_true"], group["y_pred"])),
-                "r2": float(r2_score(group["y_true"], group["y_pred"])),
-                "n": int(len(group)),
+        # Aggregate additive residual sums once at the (crop, district) grain
+        # and roll them up to per-crop, instead of hashing the rows twice.
+        group_cols = ["crop", "district"] if "district" in eval_df.columns else ["crop"]
+        resid = eval_df["y_true"] - eval_df["y_pred"]
+        sums_df = pd.DataFrame(
+            {
+                "sq": resid**2,
+                "abs": resid.abs(),
+                "y_true": eval_df["y_true"],
+                "y_true_sq": eval_df["y_true"] ** 2,
+                "n": 1,
             }
-
-    per_crop_district: Dict[str, Dict[str, float]] = {}
-    if "crop" in eval_df.columns and "district" in eval_df.columns:
-        for (crop_name, district_name), group in eval_df.groupby(
-            ["crop", "district"]
-        ):
-            if len(group) < 5:
-                continue
-            key = f"{crop_name}__{district_name}"
-            per_crop_district[key] = {
-                "rmse": float(
-                    np.sqrt(mean_squared_error(group["y_true"], group["y_pred"]))
-                ),
-                "mae": float(mean_absolute_error(group["y_true"], group["y_pred"])),
-                "r2": float(r2_score(group["y_true"], group["y_pred"])),
-                "n": int(len(group)),
+        )
+        sums_df.index = pd.MultiIndex.from_frame(eval_df[group_cols])
+        agg_cd = sums_df.sort_index().groupby(
+            level=list(range(len(group_cols))), dropna=False, observed=True
+        ).sum()
+        agg_c = agg_cd.groupby(level=0, observed=True).sum()
+
+        per_crop = _group_metrics_from_sums(agg_c[agg_c.index.notna()])
+        if len(group_cols) > 1:
+            per_crop_district = {
+                f"{crop_name}__{district_name}": m
+                for (crop_name, district_name), m in _group_metrics_from_sums(
+                    agg_cd
+                ).items()
+                if pd.notna(district_name)
             }
 
     # Per-crop yield quantiles for more contextual categorisation
     per_crop_quantiles: Dict[str, Dict[str, float]] = {}
     if "crop" in df.columns:
-        for crop_name, group in df.groupby("crop"):
-            if len(group) < 5:
-                continue
-            low_q, high_q = np.quantile(
-                group[target_col].astype(float), [0.33, 0.66]
+        crop_groups = df[target_col].astype(float).groupby(df["crop"], observed=True)
+        sizes = crop_groups.size()
+        quantiles = crop_groups.quantile([0.33, 0.66]).unstack()
+        quantiles = quantiles.loc[sizes.index[sizes >= 5]]
+        per_crop_quantiles = {
+            crop_name: {"low": float(low_q), "high": float(high_q)}
+            for crop_name, low_q, high_q in zip(
+                quantiles.index, quantiles[0.33], quantiles[0.66]
             )
-            per_crop_quantiles[crop_name] = {
-                "low": float(low_q),
-                "high": float(high_q),
-            }
+        }
 
     metrics["per_crop_metrics"] = per_crop
     metrics["per_crop_district_metrics"] = per_crop_district
@@ -413,7 +554,10 @@ def main() -> None:
     model_path = models_dir / "yield_model.pkl"
     metrics_path = models_dir / "yield_model_metrics.json"
 
-    joblib.dump(model, model_path)
+    # Uncompressed so loaders can memory-map the fitted arrays (see
+    # predict_yield). Written atomically so a process that has the old file
+    # mapped keeps reading it.
+    atomic_write(model_path, lambda tmp_path: joblib.dump(model, tmp_path, compress=0, protocol=5))
     with open(metrics_path, "w", encoding="utf-8") as f:
         json.dump(metrics, f, indent=2)
 